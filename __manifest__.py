@@ -37,7 +37,12 @@
     ],
 
     'data': [
+        'security/ir.model.access.csv',
         'views/iap_alternative_provider_views.xml',
+        'views/gatewayapi_sms_spool_views.xml',
+        'views/gatewayapi_sms_suppression_views.xml',
+        'views/sms_sms_views.xml',
+        'wizard/gatewayapi_sms_schedule_views.xml',
         'data/ir_cron_data.xml',
     ],
 
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Throughput benchmark of the GatewayAPI clients against the local fake GatewayAPI server.
+
+Needs Odoo importable (``odoo`` on the Python path) but no database::
+
+    python benchmarks/bench_client.py --sizes 1000,10000 --latency 0.02 --json before.json
+    python benchmarks/bench_client.py --sizes 1000,10000 --latency 0.02 --compare before.json
+
+Scenarios:
+
+* ``send_sms``: one ``GatewayApiClient.send_sms`` call per message, sequentially.
+* ``batch``: messages grouped by content and packed in bulk requests like the provider
+  does with batch submission, sent by ``dispatch_batches`` on ``--workers`` threads.
+* ``async``: the same batches through ``run_async_dispatch`` (needs ``httpx``).
+"""
+import argparse
+import ast
+import os
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULE_DIR = os.path.dirname(BENCHMARKS_DIR)
+SCENARIOS = ('send_sms', 'batch', 'async')
+
+
+def _ensure_addon_importable():
+    """Make ``odoo.addons.gatewayapi_sms_iap`` importable without starting an Odoo server."""
+    import odoo.addons
+    addons_dir = os.path.dirname(MODULE_DIR)
+    if addons_dir not in odoo.addons.__path__:
+        odoo.addons.__path__.append(addons_dir)
+
+
+def _module_version():
+    with open(os.path.join(MODULE_DIR, '__manifest__.py')) as manifest:
+        return ast.literal_eval(manifest.read()).get('version')
+
+
+def build_batches(messages, sender, max_recipients, max_messages, max_bytes):
+    """Group ``messages`` into ``(payload, chunk)`` units and batches the way the provider does."""
+    from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_client import analyze_messages, batch_bounds, build_sms_payload
+    encodings = analyze_messages(message_data['content'] for message_data in messages)
+    groups = {}
+    for message_data in messages:
+        groups.setdefault(message_data['content'], []).append(message_data)
+    units = []
+    for content, group in groups.items():
+        for index in range(0, len(group), max_recipients):
+            chunk = group[index:index + max_recipients]
+            payload = build_sms_payload(sender, [message_data['number'] for message_data in chunk], content,
+                                        encoding=encodings[content].encoding)
+            units.append((payload, chunk))
+    return [units[start:end] for start, end in batch_bounds([payload for payload, chunk in units], max_messages, max_bytes)]
+
+
+def count_outcomes(outcomes):
+    sent = failed = 0
+    for units, response, error in outcomes:
+        recipients = sum(len(chunk) for payload, chunk in units)
+        if error is None:
+            sent += recipients
+        else:
+            failed += recipients
+    return sent, failed
+
+
+def run_scenario(scenario, messages, url, args):
+    from odoo.exceptions import UserError
+    from odoo.addons.gatewayapi_sms_iap.services.dispatch import dispatch_batches
+    from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_client import GatewayApiClient
+    from odoo.addons.gatewayapi_sms_iap.services.resilience import RetryPolicy
+    from common import RecordingMetrics, measure, result_row
+
+    metrics = RecordingMetrics()
+    client = GatewayApiClient('benchmark-token', url, pool_maxsize=max(args.workers, 1), metrics=metrics)
+    retry_policy = RetryPolicy(args.max_retries)
+
+    if scenario == 'send_sms':
+        def send():
+            sent = failed = 0
+            for message_data in messages:
+                try:
+                    client.send_sms(args.sender, [message_data['number']], message_data['content'])
+                    sent += 1
+                except UserError:
+                    failed += 1
+            return sent, failed
+    else:
+        batches = build_batches(messages, args.sender, args.max_recipients, args.batch_messages, args.batch_bytes)
+        if scenario == 'batch':
+            def send():
+                return count_outcomes(dispatch_batches(client, batches, max_workers=args.workers, retry_policy=retry_policy))
+        else:
+            from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_async_client import run_async_dispatch
+            def send():
+                return count_outcomes(run_async_dispatch('benchmark-token', url, batches, max_in_flight=args.workers,
+                                                         retry_policy=retry_policy, circuit_breaker=client.circuit_breaker,
+                                                         metrics=metrics))
+    try:
+        (sent, failed), elapsed, peak = measure(send, trace_memory=not args.no_memory)
+    finally:
+        client.close()
+    return result_row(scenario, len(messages), elapsed, metrics.durations, peak, sent, failed, len(metrics.durations))
+
+
+def main(argv=None):
+    _ensure_addon_importable()
+    sys.path.insert(0, BENCHMARKS_DIR)
+    from common import DEFAULT_DISTINCT_CONTENTS, DEFAULT_SIZES, make_messages, print_comparison, print_results, write_results
+    from fake_gatewayapi import add_server_arguments, config_from_arguments, FakeGatewayApiServer, start_server_process
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated message counts to send.")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated subset of: %s." % ', '.join(SCENARIOS))
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent requests of the batch and async scenarios.")
+    parser.add_argument('--distinct-contents', type=int, default=DEFAULT_DISTINCT_CONTENTS)
+    parser.add_argument('--max-recipients', type=int, default=1000)
+    parser.add_argument('--batch-messages', type=int, default=500)
+    parser.add_argument('--batch-bytes', type=int, default=1000000)
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--sender', default='Benchmark')
+    parser.add_argument('--url', help="Use an already running (fake) GatewayAPI server instead of starting one.")
+    parser.add_argument('--in-process', action='store_true', help="Run the fake server in this process, in a thread.")
+    parser.add_argument('--no-memory', action='store_true', help="Do not trace memory (faster, no peak memory column).")
+    parser.add_argument('--json', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="Compare the results with a JSON file written by an earlier run.")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error("Unknown scenario(s): %s" % ', '.join(sorted(unknown)))
+    if 'async' in scenarios:
+        from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_async_client import httpx
+        if httpx is None:
+            print("httpx is not installed, skipping the async scenario.", file=sys.stderr)
+            scenarios.remove('async')
+
+    server = process = None
+    url = args.url
+    if not url:
+        if args.in_process:
+            server = FakeGatewayApiServer(config_from_arguments(args)).__enter__()
+            url = server.url
+        else:
+            process, url = start_server_process(config_from_arguments(args))
+    rows = []
+    try:
+        for scenario in scenarios: # Warm up imports, connections and the event loop outside the measurements
+            run_scenario(scenario, make_messages(10, args.distinct_contents), url, args)
+        for size in (int(size) for size in args.sizes.split(',') if size.strip()):
+            messages = make_messages(size, args.distinct_contents)
+            for scenario in scenarios:
+                rows.append(run_scenario(scenario, messages, url, args))
+                print(f"{scenario} x {size}: {rows[-1]['messages_per_second']} msg/s", file=sys.stderr)
+    finally:
+        if server:
+            server.__exit__(None, None, None)
+        if process:
+            process.terminate()
+
+    print_results(rows)
+    if args.json:
+        write_results(args.json, rows, vars(args), version=_module_version())
+    if args.compare:
+        print_comparison(args.compare, rows)
+
+
+if __name__ == '__main__':
+    main()
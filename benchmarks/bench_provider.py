@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the provider send path (``_sms_send``) against the local fake GatewayAPI server.
+
+Pipe it into an Odoo shell of a database where this module is installed. The
+benchmark provider and everything it writes are rolled back at the end::
+
+    BENCH_SIZES=1000,10000,100000 odoo shell -d mydb < benchmarks/bench_provider.py
+
+Settings are read from environment variables:
+
+* ``BENCH_SIZES``: comma-separated message counts (default ``1000,10000,100000``).
+* ``BENCH_CONCURRENCY``, ``BENCH_DISPATCH_MODE`` (``threads``/``async``), ``BENCH_BATCH_MODE``
+  (``0``/``1``), ``BENCH_RATE_LIMIT``: provider settings under test.
+* ``BENCH_LATENCY``, ``BENCH_ERROR_RATE``, ``BENCH_REJECT_RATE``, ``BENCH_THROTTLE_RATE``: fake server behaviour.
+* ``BENCH_JSON`` / ``BENCH_COMPARE``: store the results / compare them with an earlier run.
+"""
+import os
+import time
+
+from odoo.addons.gatewayapi_sms_iap.benchmarks.common import (
+    DEFAULT_SIZES, RecordingMetrics, make_messages, measure, print_comparison, print_results, result_row, write_results,
+)
+from odoo.addons.gatewayapi_sms_iap.benchmarks.fake_gatewayapi import FakeGatewayApiConfig, start_server_process
+
+
+def _setting(name, default, cast=str):
+    value = os.environ.get(name)
+    return cast(value) if value not in (None, '') else default
+
+
+def run_provider_benchmark(env):
+    sizes = [int(size) for size in _setting('BENCH_SIZES', ','.join(str(size) for size in DEFAULT_SIZES)).split(',')]
+    config = FakeGatewayApiConfig(
+        latency=_setting('BENCH_LATENCY', 0.0, float), error_rate=_setting('BENCH_ERROR_RATE', 0.0, float),
+        reject_rate=_setting('BENCH_REJECT_RATE', 0.0, float), throttle_rate=_setting('BENCH_THROTTLE_RATE', 0.0, float),
+        retry_after=0, seed=0,
+    )
+    provider_values = {
+        'gatewayapi_max_concurrency': _setting('BENCH_CONCURRENCY', 4, int),
+        'gatewayapi_dispatch_mode': _setting('BENCH_DISPATCH_MODE', 'threads'),
+        'gatewayapi_batch_mode': bool(_setting('BENCH_BATCH_MODE', 1, int)),
+        'gatewayapi_rate_limit': _setting('BENCH_RATE_LIMIT', 0.0, float),
+    }
+    process, url = start_server_process(config)
+    rows = []
+    try:
+        provider = env['iap.alternative.provider'].create(dict(
+            provider_values,
+            name="GatewayAPI Benchmark",
+            provider='gatewayapi',
+            # A fresh token per run gives the benchmark its own cached client and metrics.
+            gatewayapi_api_token=f"benchmark-{time.time()}",
+            gatewayapi_base_url=url,
+            gatewayapi_sender_name="Benchmark",
+            gatewayapi_use_spool=False,
+            gatewayapi_check_balance_enabled=False,
+        ))
+        iap_account = env['iap.account'].browse()
+        for size in sizes:
+            messages = make_messages(size)
+            metrics = RecordingMetrics()
+            provider._get_gatewayapi_client().metrics = metrics
+            results, elapsed, peak = measure(lambda: provider._sms_send(iap_account, messages))
+            sent = sum(1 for result in results if result['state'] == 'success')
+            rows.append(result_row('provider_%s' % provider_values['gatewayapi_dispatch_mode'], size, elapsed,
+                                   metrics.durations, peak, sent, len(results) - sent, len(metrics.durations)))
+            print(f"_sms_send x {size}: {rows[-1]['messages_per_second']} msg/s")
+    finally:
+        process.terminate()
+        env.cr.rollback()
+
+    print_results(rows)
+    if _setting('BENCH_JSON', None):
+        module = env['ir.module.module'].search([('name', '=', 'gatewayapi_sms_iap')], limit=1)
+        write_results(_setting('BENCH_JSON', None), rows, dict(provider_values, sizes=sizes, latency=config.latency,
+                                                                error_rate=config.error_rate, throttle_rate=config.throttle_rate),
+                      version=module.latest_version)
+    if _setting('BENCH_COMPARE', None):
+        print_comparison(_setting('BENCH_COMPARE', None), rows)
+    return rows
+
+
+if 'env' in globals(): # Piped into ``odoo shell``
+    run_provider_benchmark(env)
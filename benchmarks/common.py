@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Shared helpers of the benchmark scripts: message generation, measuring and reporting."""
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from odoo.addons.gatewayapi_sms_iap.services.metrics import GatewayApiMetrics
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_DISTINCT_CONTENTS = 100
+
+
+def make_messages(count, distinct_contents=DEFAULT_DISTINCT_CONTENTS, ucs2_share=0.1, seed=0):
+    """Build ``count`` ``_sms_send`` style message dicts with unique numbers.
+
+    Contents cycle through ``distinct_contents`` texts, like a campaign with a few
+    variants, and about ``ucs2_share`` of them need UCS-2.
+    """
+    rng = random.Random(seed)
+    contents = []
+    for index in range(max(distinct_contents, 1)):
+        text = f"Hello, your order #{index} is ready for pickup. Reply STOP to opt out."
+        if rng.random() < ucs2_share:
+            text += " \U0001F4E6"
+        contents.append(text)
+    return [
+        {'res_id': index + 1, 'number': f"45{20000000 + index}", 'content': contents[index % len(contents)]}
+        for index in range(count)
+    ]
+
+
+class RecordingMetrics(GatewayApiMetrics):
+    """Client metrics that also keep every request duration, for exact percentiles."""
+
+    def __init__(self):
+        super().__init__()
+        self.durations = []
+
+    def record_request(self, method, endpoint, status, duration, bytes_sent=0):
+        super().record_request(method, endpoint, status, duration, bytes_sent)
+        self.durations.append(duration)
+
+
+def percentile(values, q):
+    """Nearest-rank ``q`` percentile (0-100) of ``values``, 0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(int(round(q / 100.0 * len(ordered))) - 1, 0))]
+
+
+def measure(function, trace_memory=True):
+    """Run ``function()`` and return ``(result, elapsed_seconds, peak_traced_bytes)``.
+
+    Memory is the peak of Python allocations traced while running, ``None`` when
+    ``trace_memory`` is off; tracing slows allocation-heavy code down noticeably.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = function()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def result_row(scenario, size, elapsed, latencies, peak_bytes, sent, failed, requests_count):
+    return {
+        'scenario': scenario,
+        'messages': size,
+        'seconds': round(elapsed, 3),
+        'messages_per_second': round(size / elapsed, 1) if elapsed else 0.0,
+        'requests': requests_count,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'peak_memory_mb': round(peak_bytes / 1048576.0, 2) if peak_bytes is not None else None,
+        'sent': sent,
+        'failed': failed,
+    }
+
+
+def print_results(rows):
+    columns = ['scenario', 'messages', 'seconds', 'messages_per_second', 'requests', 'p50_ms', 'p99_ms',
+               'peak_memory_mb', 'sent', 'failed']
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def write_results(path, rows, parameters, version=None):
+    """Store ``rows`` as JSON together with the run parameters, for comparison with later releases."""
+    with open(path, 'w') as output:
+        json.dump({
+            'module_version': version,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'parameters': parameters,
+            'results': rows,
+        }, output, indent=2)
+
+
+def print_comparison(path, rows):
+    """Print the throughput and latency change of ``rows`` against the results stored at ``path``."""
+    with open(path) as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {(row['scenario'], row['messages']): row for row in baseline['results']}
+    print(f"\nCompared with {path} (module version {baseline.get('module_version')}, {baseline.get('date')}):")
+    for row in rows:
+        before = previous.get((row['scenario'], row['messages']))
+        if not before or not before['messages_per_second']:
+            continue
+        change = (row['messages_per_second'] / before['messages_per_second'] - 1) * 100
+        print(f"  {row['scenario']} x {row['messages']}: {before['messages_per_second']} -> "
+              f"{row['messages_per_second']} msg/s ({change:+.1f}%), p99 {before['p99_ms']} -> {row['p99_ms']} ms")
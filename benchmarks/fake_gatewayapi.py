@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the GatewayAPI REST endpoints used by this module.
+
+Answers ``POST rest/mtsms`` (one message object or a list of them), ``GET rest/me``
+and ``DELETE rest/mtsms/<id>`` like GatewayAPI does, after an optional artificial
+latency, and fails a configurable share of the requests with 5xx errors, 422
+rejections or 429 throttling, as well as every message request including one of
+``reject_recipients``. Run it standalone to point an Odoo provider at it::
+
+    python benchmarks/fake_gatewayapi.py --port 8899 --latency 0.05 --throttle-rate 0.01
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGatewayApiConfig:
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, reject_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, credits=1000000.0, currency='DKK', seed=None, reject_recipients=()):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.credits = credits
+        self.currency = currency
+        self.seed = seed
+        self.reject_recipients = set(reject_recipients)
+
+
+class _FakeGatewayApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, as with the real API
+    disable_nagle_algorithm = True
+    wbufsize = -1 # Headers and body leave in one write, flushed after each request
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None, headers=()):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _failure(self):
+        """Simulate latency, then return the failure to answer with, or ``None`` to answer normally."""
+        server = self.server
+        config = server.config
+        delay = config.latency + (server.random.uniform(0, config.jitter) if config.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        draw = server.random.random()
+        if draw < config.throttle_rate:
+            return 429, {'message': 'Too many requests'}, [('Retry-After', str(config.retry_after))]
+        draw -= config.throttle_rate
+        if draw < config.error_rate:
+            return 503, {'message': 'Service unavailable'}, []
+        draw -= config.error_rate
+        if draw < config.reject_rate:
+            return 422, {'message': 'Invalid recipient'}, []
+        return None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        failure = self._failure()
+        server = self.server
+        with server.lock:
+            server.stats['requests'] += 1
+        if failure:
+            with server.lock:
+                server.stats['failed'] += 1
+            return self._reply(*failure)
+        if self.path.rstrip('/') != '/rest/mtsms':
+            return self._reply(404, {'message': 'Not found'})
+        try:
+            messages = json.loads(body)
+        except ValueError:
+            return self._reply(400, {'message': 'Invalid JSON'})
+        messages = messages if isinstance(messages, list) else [messages]
+        if any(recipient.get('msisdn') in server.config.reject_recipients
+               for message in messages for recipient in message.get('recipients') or []):
+            with server.lock:
+                server.stats['failed'] += 1
+            return self._reply(422, {'message': 'Invalid recipient'})
+        with server.lock:
+            ids = [next(server.ids) for _message in messages]
+            server.stats['messages'] += len(messages)
+            server.stats['recipients'] += sum(len(message.get('recipients') or []) for message in messages)
+        self._reply(200, {'ids': ids, 'usage': {'countries': {}, 'currency': server.config.currency, 'total_cost': 0}})
+
+    def do_GET(self):
+        failure = self._failure()
+        if failure:
+            return self._reply(*failure)
+        if self.path.split('?')[0].rstrip('/') != '/rest/me':
+            return self._reply(404, {'message': 'Not found'})
+        config = self.server.config
+        self._reply(200, {'credits': config.credits, 'currency': config.currency, 'id': 1})
+
+    def do_DELETE(self):
+        failure = self._failure()
+        if failure:
+            return self._reply(*failure)
+        if not self.path.startswith('/rest/mtsms/'):
+            return self._reply(404, {'message': 'Not found'})
+        self._reply(204)
+
+
+class FakeGatewayApiServer(ThreadingHTTPServer):
+    """Threaded fake GatewayAPI server; use it as a context manager to serve from a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        super().__init__((host, port), _FakeGatewayApiHandler)
+        self.config = config or FakeGatewayApiConfig()
+        self.random = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.stats = {'requests': 0, 'failed': 0, 'messages': 0, 'recipients': 0}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-gatewayapi', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def _serve(config, host, port, url_queue):
+    server = FakeGatewayApiServer(config, host, port)
+    url_queue.put(server.url)
+    server.serve_forever()
+
+
+def start_server_process(config=None, host='127.0.0.1', port=0):
+    """Serve from a child process, so the server does not compete with the benchmark for the GIL.
+
+    Returns ``(process, url)``; terminate the process when done.
+    """
+    url_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(config or FakeGatewayApiConfig(), host, port, url_queue),
+                                      daemon=True)
+    process.start()
+    return process, url_queue.get(timeout=10)
+
+
+def add_server_arguments(parser):
+    group = parser.add_argument_group('fake GatewayAPI server')
+    group.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+    group.add_argument('--jitter', type=float, default=0.0, help="Random extra latency, up to this many seconds.")
+    group.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with HTTP 503.")
+    group.add_argument('--reject-rate', type=float, default=0.0, help="Share of requests answered with HTTP 422.")
+    group.add_argument('--throttle-rate', type=float, default=0.0, help="Share of requests answered with HTTP 429.")
+    group.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429 answers.")
+    group.add_argument('--seed', type=int, default=None, help="Seed for reproducible failure sequences.")
+    return parser
+
+
+def config_from_arguments(args):
+    return FakeGatewayApiConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                reject_rate=args.reject_rate, throttle_rate=args.throttle_rate,
+                                retry_after=args.retry_after, seed=args.seed)
+
+
+if __name__ == '__main__':
+    parser = add_server_arguments(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    args = parser.parse_args()
+    server = FakeGatewayApiServer(config_from_arguments(args), args.host, args.port)
+    print(f"Fake GatewayAPI listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import hmac
+import json
+import logging
+
+from odoo import http
+from odoo.http import request
+
+try:
+    from odoo.addons.gatewayapi_sms_iap.services.metrics import prometheus_text
+except ImportError:
+    prometheus_text = None
+
+_logger = logging.getLogger(__name__)
+
+METRICS_ENDPOINT_PARAM = 'gatewayapi_sms_iap.metrics_endpoint'
+
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+def verify_gatewayapi_signature(token, secret):
+    """Check the HS256 JWT GatewayAPI sends in the ``X-Gwapi-Signature`` header against ``secret``.
+
+    Returns the decoded JWT payload, which holds the delivery report, or ``None`` when the
+    token is missing, malformed or not signed with ``secret``.
+    """
+    if not secret:
+        return None
+    try:
+        header_b64, payload_b64, signature_b64 = token.split('.')
+        header = json.loads(_b64decode(header_b64))
+        signature = _b64decode(signature_b64)
+    except (AttributeError, ValueError, TypeError):
+        return None
+    if not isinstance(header, dict) or header.get('alg') != 'HS256':
+        return None
+    expected = hmac.new(secret.encode(), f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        return None
+    try:
+        return json.loads(_b64decode(payload_b64))
+    except (ValueError, TypeError):
+        return None
+
+
+class GatewayApiWebhookController(http.Controller):
+
+    @http.route('/gatewayapi/status/<int:provider_id>', type='http', auth='public', methods=['POST'], csrf=False)
+    def gatewayapi_delivery_status(self, provider_id, **kwargs):
+        """Receive a signed GatewayAPI delivery report and buffer it for bulk processing.
+
+        The report is read from the verified JWT payload of the ``X-Gwapi-Signature`` header, not
+        from the request body, so a captured token cannot be replayed with other reports. Reports
+        are refused while the provider has no webhook secret.
+        """
+        provider = request.env['iap.alternative.provider'].sudo().browse(provider_id).exists()
+        if not provider or provider.provider != 'gatewayapi':
+            return request.make_response('Unknown provider', status=404)
+        if not provider.gatewayapi_webhook_secret:
+            _logger.warning("Rejected GatewayAPI delivery report for provider '%s': no webhook secret is configured.",
+                            provider.name)
+            return request.make_response('Webhook secret not configured', status=403)
+        reports = verify_gatewayapi_signature(
+            request.httprequest.headers.get('X-Gwapi-Signature'), provider.gatewayapi_webhook_secret)
+        if not reports:
+            _logger.warning("Rejected GatewayAPI delivery report with invalid signature for provider '%s'.", provider.name)
+            return request.make_response('Invalid signature', status=403)
+        count = request.env['gatewayapi.sms.status'].sudo()._buffer_reports(provider, reports or [])
+        _logger.debug("Buffered %s GatewayAPI delivery report(s) for provider '%s'.", count, provider.name)
+        return request.make_response(json.dumps({'buffered': count}), headers=[('Content-Type', 'application/json')])
+
+    @http.route('/gatewayapi/metrics', type='http', auth='user', methods=['GET'])
+    def gatewayapi_metrics(self, **kwargs):
+        """Expose this process's GatewayAPI metrics in the Prometheus text format, when enabled.
+
+        Off unless the ``gatewayapi_sms_iap.metrics_endpoint`` system parameter is set; only
+        settings administrators may read it. Counters are per server process and per account.
+        """
+        env = request.env
+        if not prometheus_text or not env['ir.config_parameter'].sudo().get_param(METRICS_ENDPOINT_PARAM):
+            return request.not_found()
+        if not env.user.has_group('base.group_system'):
+            return request.make_response('Forbidden', status=403)
+        providers = env['iap.alternative.provider'].sudo().search([
+            ('provider', '=', 'gatewayapi'), ('gatewayapi_api_token', '!=', False),
+        ])
+        snapshots = {}
+        for provider in providers:
+            metrics = provider._gatewayapi_metrics()
+            if id(metrics) not in snapshots: # Providers sharing an account share its metrics
+                snapshots[id(metrics)] = ({'account': provider.gatewayapi_account_name or provider.name}, metrics.snapshot())
+        return request.make_response(prometheus_text(snapshots.values()),
+                                     headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')])
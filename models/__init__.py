@@ -1,2 +1,7 @@
 # -*- coding: utf-8 -*-
 from . import iap_alternative_provider_inherit
+from . import gatewayapi_sms_spool
+from . import sms_sms
+from . import gatewayapi_sms_status
+from . import gatewayapi_sms_suppression
+from . import gatewayapi_balance_ledger
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+
+
+class GatewayApiBalanceLedger(models.Model):
+    """Append-only estimate of the GatewayAPI balance of each provider.
+
+    A ``reconcile`` entry records a balance read from GatewayAPI (``rest/me``); ``debit``
+    entries the estimated cost of the SMS sent since. Entries are only ever inserted, in the
+    caller's transaction, so concurrent sends never contend for a row. The estimate is
+    approximate: debits of a transaction rolled back after its SMS were handed over are lost,
+    and debits of transactions not committed yet are not seen. Both are corrected by the
+    next reconciliation.
+    """
+    _name = 'gatewayapi.balance.ledger'
+    _description = 'GatewayAPI Balance Ledger'
+    _order = 'id'
+
+    provider_id = fields.Many2one('iap.alternative.provider', string=_("Provider"), required=True,
+                                  ondelete='cascade', index=True)
+    kind = fields.Selection([('reconcile', _('Reconciliation')), ('debit', _('Debit'))],
+                            string=_("Kind"), required=True)
+    amount = fields.Float(string=_("Amount"), required=True,
+                          help=_("Balance read from GatewayAPI for reconciliations, estimated cost for debits."))
+    currency = fields.Char(string=_("Currency"))
+    date = fields.Datetime(string=_("Date"), required=True, default=fields.Datetime.now)
+
+    @api.model
+    def _get_balances(self, providers):
+        """Return ``{provider_id: (credits, currency, reconciled on)}`` for the ``providers`` ever reconciled.
+
+        ``credits`` is the last balance read from GatewayAPI minus the debits recorded after it.
+        """
+        if not providers:
+            return {}
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT reconcile.provider_id, reconcile.amount - COALESCE(SUM(debit.amount), 0),
+                   reconcile.currency, reconcile.date
+              FROM (SELECT DISTINCT ON (provider_id) id, provider_id, amount, currency, date
+                      FROM gatewayapi_balance_ledger
+                     WHERE kind = 'reconcile' AND provider_id IN %s
+                  ORDER BY provider_id, id DESC) AS reconcile
+         LEFT JOIN gatewayapi_balance_ledger AS debit
+                ON debit.provider_id = reconcile.provider_id AND debit.kind = 'debit' AND debit.id > reconcile.id
+          GROUP BY reconcile.provider_id, reconcile.amount, reconcile.currency, reconcile.date
+        """, [tuple(providers.ids)])
+        return {provider_id: (credits, currency, date) for provider_id, credits, currency, date in self.env.cr.fetchall()}
+
+    @api.autovacuum
+    def _gc_superseded_entries(self):
+        # Entries older than the latest reconciliation of their provider no longer count.
+        self.env.cr.execute("""
+            DELETE FROM gatewayapi_balance_ledger AS entry
+             USING (SELECT provider_id, MAX(id) AS id FROM gatewayapi_balance_ledger
+                     WHERE kind = 'reconcile' GROUP BY provider_id) AS latest
+             WHERE entry.provider_id = latest.provider_id AND entry.id < latest.id
+        """)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_CHUNK_SIZE = 1000
+DEFAULT_SPOOL_TIME_LIMIT = 240 # Seconds, kept below the default cron worker time limit
+SPOOL_RETENTION_DAYS = 7
+
+# IAP result states returned by _sms_send, translated to sms.sms failure types.
+IAP_STATE_TO_SMS_FAILURE_TYPE = {
+    'insufficient_credit': 'sms_credit',
+    'wrong_number_format': 'sms_number_format',
+    'unregistered': 'sms_acc',
+    'server_error': 'sms_server',
+    'suppressed': 'sms_blacklist',
+}
+
+
+class GatewayApiSmsSpool(models.Model):
+    _name = 'gatewayapi.sms.spool'
+    _description = 'GatewayAPI Outbound SMS Spool'
+    _order = 'id'
+
+    provider_id = fields.Many2one('iap.alternative.provider', string=_("Provider"), required=True,
+                                  ondelete='cascade', index=True)
+    sms_id = fields.Integer(string=_("SMS ID"), index=True,
+                            help=_("ID of the sms.sms record (res_id) this message was queued for."))
+    number = fields.Char(string=_("Number"), required=True)
+    content = fields.Text(string=_("Content"), required=True)
+    state = fields.Selection([
+        ('queued', _('Queued')), ('sent', _('Sent')), ('error', _('Error'))],
+        string=_("Status"), default='queued', required=True, index=True)
+    result_state = fields.Char(string=_("Result"), readonly=True)
+    error_text = fields.Text(string=_("Error"), readonly=True)
+    message_id_3rd_party = fields.Char(string=_("GatewayAPI Message ID"), readonly=True)
+    sent_date = fields.Datetime(string=_("Processed On"), readonly=True)
+
+    @api.model
+    def _enqueue(self, provider, messages):
+        """Queue ``messages`` for ``provider`` and return the ``_sms_send`` results Odoo should post-process: none.
+
+        Results would let Odoo finalise the SMS, marking them sent or deleting them, before they
+        are sent. Queued SMS are moved to the state of SMS handed over to GatewayAPI instead
+        (``pending`` where it exists), which takes them out of the outgoing queue; failures met
+        while draining the spool are written back to them.
+        """
+        SmsSms = self.env['sms.sms'].sudo()
+        SmsSms._gatewayapi_update_states(dict.fromkeys(
+            (message_data['res_id'] for message_data in messages), (SmsSms._gatewayapi_scheduled_state(), False)))
+        self.create([{
+            'provider_id': provider.id,
+            'sms_id': message_data['res_id'],
+            'number': str(message_data['number']),
+            'content': message_data['content'],
+        } for message_data in messages])
+        self._trigger_drain()
+        _logger.info("Queued %s SMS in the GatewayAPI spool for provider '%s'.", len(messages), provider.name)
+        return []
+
+    @api.model
+    def _trigger_drain(self):
+        """Start every active spool drain cron; those finding nothing left to claim end at once.
+
+        A cron job runs in one cron thread at a time, so the spool is drained in parallel by
+        several scheduled actions calling ``_cron_drain``: the ones shipped with the module and
+        any copy of them.
+        """
+        crons = self.env['ir.cron'].sudo().search([
+            ('model_id.model', '=', self._name), ('code', 'like', '_cron_drain('),
+        ])
+        for cron in crons:
+            cron._trigger()
+
+    def _claim(self, limit):
+        """Lock and return up to ``limit`` queued jobs, skipping jobs already claimed by another worker."""
+        self.flush_model(['state'])
+        self.env.cr.execute("""
+            SELECT id FROM gatewayapi_sms_spool
+             WHERE state = 'queued'
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_drain(self, chunk_size=DEFAULT_SPOOL_CHUNK_SIZE, time_limit=DEFAULT_SPOOL_TIME_LIMIT):
+        """Send queued jobs chunk by chunk, committing after each chunk.
+
+        Chunks are claimed with ``FOR UPDATE SKIP LOCKED``, so the drain crons (see
+        ``_trigger_drain``) empty the spool in parallel, on one or several servers, as far
+        as free cron threads allow.
+        """
+        deadline = time.monotonic() + time_limit
+        testing = getattr(threading.current_thread(), 'testing', False)
+        processed = 0
+        while time.monotonic() < deadline:
+            jobs = self._claim(chunk_size)
+            if not jobs:
+                break
+            jobs._process()
+            processed += len(jobs)
+            if not testing:
+                self.env.cr.commit()
+        else:
+            # Time budget exhausted with work left: run again as soon as possible.
+            self._trigger_drain()
+        _logger.info("CRON: GatewayAPI spool drained %s job(s).", processed)
+        return True
+
+    def _process(self):
+        """Send the jobs in ``self`` grouped by provider, then store and propagate the results in bulk."""
+        jobs_by_provider = {}
+        for job in self:
+            jobs_by_provider.setdefault(job.provider_id, self.browse())
+            jobs_by_provider[job.provider_id] |= job
+
+        results_by_job = {}
+        for provider, jobs in jobs_by_provider.items():
+            messages = [{'res_id': job.id, 'number': job.number, 'content': job.content} for job in jobs]
+            if not provider.gatewayapi_sender_name:
+                error_text = _("GatewayAPI Default Sender Name is not configured.")
+                results = [{'res_id': job.id, 'state': 'server_error', 'error_text': error_text} for job in jobs]
+            else:
+                results = provider._gatewayapi_send_messages(messages)
+            results_by_job.update((result['res_id'], result) for result in results)
+
+        now = fields.Datetime.now()
+        jobs_by_values = {}
+        sms_failures = {}
+        for job in self:
+            result = results_by_job.get(job.id) or {'state': 'server_error', 'error_text': _("No result returned.")}
+            values = (
+                'sent' if result['state'] == 'success' else 'error',
+                result['state'],
+                result.get('error_text') or False,
+                result.get('message_id_3rd_party') or False,
+            )
+            jobs_by_values.setdefault(values, []).append(job.id)
+            if result['state'] != 'success' and job.sms_id:
+                sms_failures[job.sms_id] = IAP_STATE_TO_SMS_FAILURE_TYPE.get(result['state'], 'sms_server')
+
+        # Jobs sharing a result (e.g. recipients of one multi-recipient message) get a single write.
+        for (state, result_state, error_text, message_id), job_ids in jobs_by_values.items():
+            self.browse(job_ids).write({
+                'state': state, 'result_state': result_state, 'error_text': error_text,
+                'message_id_3rd_party': message_id, 'sent_date': now,
+            })
+        self.env['sms.sms']._gatewayapi_link_message_ids({
+            job.sms_id: results_by_job[job.id]['message_id_3rd_party']
+            for job in self if results_by_job.get(job.id, {}).get('message_id_3rd_party')
+        })
+        if sms_failures:
+            self.env['sms.sms']._gatewayapi_update_states(
+                {sms_id: ('error', failure_type) for sms_id, failure_type in sms_failures.items()})
+
+    @api.autovacuum
+    def _gc_processed_jobs(self):
+        limit_date = fields.Datetime.now() - timedelta(days=SPOOL_RETENTION_DAYS)
+        self.search([('state', '!=', 'queued'), ('sent_date', '<', limit_date)]).unlink()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from odoo import models, fields, api, _
+
+try:
+    from odoo.addons.gatewayapi_sms_iap.services.phone import normalize_msisdn
+except ImportError:
+    normalize_msisdn = None
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS_CHUNK_SIZE = 5000
+DEFAULT_STATUS_TIME_LIMIT = 240 # Seconds
+STATUS_TRIGGER_DELAY = 15 # Seconds; callbacks arriving meanwhile are applied in the same run
+
+# Final GatewayAPI delivery statuses; intermediate ones (ACCEPTED, ENROUTE, BUFFERED, ...) are ignored.
+GATEWAYAPI_STATUS_TO_SMS_STATE = {
+    'DELIVERED': ('sent', False),
+    'UNDELIVERABLE': ('error', 'sms_not_delivered'),
+    'EXPIRED': ('error', 'sms_expired'),
+    'REJECTED': ('error', 'sms_rejected'),
+    'DELETED': ('error', 'sms_not_delivered'),
+    'SKIPPED': ('error', 'sms_not_delivered'),
+}
+
+_NON_DIGITS = re.compile(r'\D')
+_last_trigger = {'time': 0.0}
+
+
+def msisdn_key(number):
+    """Digits-only form of a phone number, used to match delivery reports to SMS records."""
+    digits = _NON_DIGITS.sub('', str(number or ''))
+    return digits[2:] if digits.startswith('00') else digits
+
+
+class GatewayApiSmsStatus(models.Model):
+    _name = 'gatewayapi.sms.status'
+    _description = 'GatewayAPI Delivery Report Buffer'
+    _order = 'id'
+
+    provider_id = fields.Many2one('iap.alternative.provider', string=_("Provider"), ondelete='cascade')
+    message_id = fields.Char(string=_("GatewayAPI Message ID"), required=True)
+    msisdn = fields.Char(string=_("MSISDN"))
+    status = fields.Char(string=_("Status"), required=True)
+    error_text = fields.Char(string=_("Error"))
+    error_code = fields.Char(string=_("Error Code"))
+    status_date = fields.Datetime(string=_("Status Time"))
+
+    @api.model
+    def _buffer_reports(self, provider, reports):
+        """Store raw GatewayAPI delivery reports (a dict or a list of dicts) for bulk processing.
+
+        Returns the number of reports buffered.
+        """
+        if isinstance(reports, dict):
+            reports = [reports]
+        vals_list = []
+        for report in reports:
+            if not isinstance(report, dict) or report.get('id') is None or not report.get('status'):
+                continue
+            status_time = report.get('time')
+            vals_list.append({
+                'provider_id': provider.id,
+                'message_id': str(report['id']),
+                'msisdn': msisdn_key(report.get('msisdn')),
+                'status': str(report['status']).upper(),
+                'error_text': report.get('error') or False,
+                'error_code': report.get('code') or False,
+                'status_date': datetime.utcfromtimestamp(status_time) if isinstance(status_time, (int, float)) else False,
+            })
+        if vals_list:
+            self.create(vals_list)
+            self._trigger_apply()
+        return len(vals_list)
+
+    @api.model
+    def _trigger_apply(self):
+        # One cron trigger per process every few seconds, not one per callback.
+        now = time.monotonic()
+        if now - _last_trigger['time'] < STATUS_TRIGGER_DELAY:
+            return
+        _last_trigger['time'] = now
+        cron = self.env.ref('gatewayapi_sms_iap.ir_cron_apply_gatewayapi_sms_status', raise_if_not_found=False)
+        if cron:
+            cron._trigger(fields.Datetime.now() + timedelta(seconds=STATUS_TRIGGER_DELAY))
+
+    def _claim(self, limit):
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT id FROM gatewayapi_sms_status
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_apply(self, chunk_size=DEFAULT_STATUS_CHUNK_SIZE, time_limit=DEFAULT_STATUS_TIME_LIMIT):
+        """Apply buffered delivery reports to sms.sms chunk by chunk, then drop them from the buffer."""
+        deadline = time.monotonic() + time_limit
+        testing = getattr(threading.current_thread(), 'testing', False)
+        applied = 0
+        while time.monotonic() < deadline:
+            reports = self._claim(chunk_size)
+            if not reports:
+                break
+            reports._apply()
+            applied += len(reports)
+            reports.unlink()
+            if not testing:
+                self.env.cr.commit()
+        _logger.info("CRON: Applied %s GatewayAPI delivery report(s).", applied)
+        return True
+
+    def _apply(self):
+        """Update the SMS records matching the reports in ``self`` with one search and grouped writes."""
+        # Keep the latest final status per (message id, number).
+        final_reports = {}
+        for report in self.sorted(lambda r: (r.status_date or datetime.min, r.id)):
+            if report.status in GATEWAYAPI_STATUS_TO_SMS_STATE:
+                final_reports[(report.message_id, report.msisdn)] = report
+        if not final_reports:
+            return
+
+        message_ids = list({message_id for message_id, _msisdn in final_reports})
+        sms_records = self.env['sms.sms'].sudo().search_read(
+            [('gatewayapi_message_id', 'in', message_ids)], ['gatewayapi_message_id', 'number'])
+        # Numbers are sent normalized with the provider's default country code, which reports echo.
+        country_codes = {message_id: report.provider_id.gatewayapi_default_country_code or None
+                         for (message_id, _msisdn), report in final_reports.items()}
+        sms_by_key = {}
+        for sms in sms_records:
+            message_id = sms['gatewayapi_message_id']
+            key = normalize_msisdn(sms['number'], country_codes.get(message_id)) or msisdn_key(sms['number'])
+            sms_by_key.setdefault((message_id, key), []).append(sms['id'])
+            # Single-recipient messages also match when the number was reformatted by GatewayAPI.
+            sms_by_key.setdefault((message_id, None), []).append(sms['id'])
+
+        updates = {}
+        for (message_id, msisdn), report in final_reports.items():
+            sms_ids = sms_by_key.get((message_id, msisdn))
+            if not sms_ids:
+                candidates = sms_by_key.get((message_id, None), [])
+                sms_ids = candidates if len(candidates) == 1 else []
+            for sms_id in sms_ids:
+                updates[sms_id] = GATEWAYAPI_STATUS_TO_SMS_STATE[report.status]
+        if updates:
+            self.env['sms.sms']._gatewayapi_update_states(updates)
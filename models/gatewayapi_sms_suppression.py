@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.tools import sql
+
+try:
+    from odoo.addons.gatewayapi_sms_iap.services.phone import normalize_msisdn
+    from odoo.addons.gatewayapi_sms_iap.services.suppression import get_suppression_index
+except ImportError:
+    normalize_msisdn = None
+    get_suppression_index = None
+
+_logger = logging.getLogger(__name__)
+
+
+class GatewayApiSmsSuppression(models.Model):
+    _name = 'gatewayapi.sms.suppression'
+    _description = 'GatewayAPI SMS Suppression List'
+    _order = 'id desc'
+    _rec_name = 'number'
+
+    provider_id = fields.Many2one('iap.alternative.provider', string=_("Provider"), ondelete='cascade', index=True,
+                                  domain=[('provider', '=', 'gatewayapi')],
+                                  help=_("Leave empty to suppress the number for all GatewayAPI providers."))
+    number = fields.Char(string=_("Number"), required=True,
+                         help=_("Stored in E.164 format without '+', e.g. 4512345678."))
+    reason = fields.Selection([
+        ('optout', _('Opt-out')), ('invalid', _('Invalid Number')), ('manual', _('Manual'))],
+        string=_("Reason"), default='manual', required=True)
+    note = fields.Char(string=_("Note"))
+
+    _sql_constraints = [
+        ('provider_number_uniq', 'unique(provider_id, number)', 'This number is already suppressed for this provider.'),
+    ]
+
+    def _auto_init(self):
+        res = super()._auto_init()
+        # The suppression cache loads the rows written since its last refresh.
+        sql.create_index(self._cr, 'gatewayapi_sms_suppression_write_date_index', self._table, ['write_date'])
+        return res
+
+    def _normalize_values(self, vals):
+        if vals.get('number'):
+            provider = self.env['iap.alternative.provider'].browse(vals.get('provider_id') or self[:1].provider_id.id)
+            number = normalize_msisdn(vals['number'], provider.gatewayapi_default_country_code or None)
+            if not number:
+                raise ValidationError(_("'%s' is not a valid phone number.") % vals['number'])
+            vals['number'] = number
+        return vals
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create([self._normalize_values(dict(vals)) for vals in vals_list])
+        self._expire_suppression_index()
+        return records
+
+    def write(self, vals):
+        res = super().write(self._normalize_values(dict(vals)))
+        self._expire_suppression_index()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._expire_suppression_index()
+        return res
+
+    def _expire_suppression_index(self):
+        if get_suppression_index:
+            get_suppression_index(self.env.cr.dbname).expire()
+
+    @api.model
+    def _get_suppression_index(self):
+        """Return this process's ``SuppressionIndex`` of the database, refreshed if it is due for a check.
+
+        A check counts the rows and loads those written since the previous refresh; when the
+        counts then disagree (rows were removed) the whole list is reloaded.
+        """
+        index = get_suppression_index(self.env.cr.dbname)
+        if not index.needs_check():
+            return index
+        with index.lock:
+            if not index.needs_check(): # Refreshed by another thread meanwhile
+                return index
+            self.flush_model()
+            cr = self.env.cr
+            cr.execute("SELECT count(*) FROM gatewayapi_sms_suppression")
+            row_count = cr.fetchone()[0]
+            started = time.monotonic()
+            if not index.needs_reload() and index.last_write_date is not None:
+                cr.execute("SELECT id, provider_id, number, write_date FROM gatewayapi_sms_suppression WHERE write_date >= %s",
+                           [index.last_write_date])
+                index.add(cr.fetchall())
+            if index.needs_reload() or len(index.row_ids) != row_count:
+                cr.execute("SELECT id, provider_id, number, write_date FROM gatewayapi_sms_suppression")
+                index.replace(cr.fetchall())
+                _logger.info("Loaded %s suppressed number(s) in %.3f seconds.", row_count, time.monotonic() - started)
+            index.checked_at = time.monotonic()
+        return index
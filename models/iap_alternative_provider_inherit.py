@@ -1,22 +1,93 @@
 # -*- coding: utf-8 -*-
 import logging
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from markupsafe import Markup
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 
+from .gatewayapi_sms_spool import IAP_STATE_TO_SMS_FAILURE_TYPE
+
 try:
-    from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_client import GatewayApiClient, DEFAULT_GATEWAYAPI_BASE_URL, message_requires_ucs2
+    from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_client import (
+        GatewayApiClient, DEFAULT_GATEWAYAPI_BASE_URL, DEFAULT_MAX_RECIPIENTS_PER_REQUEST,
+        DEFAULT_BATCH_MAX_MESSAGES, DEFAULT_BATCH_MAX_BYTES, DEFAULT_POOL_MAXSIZE, batch_bounds,
+        analyze_messages, client_registry_stats, get_client, invalidate_client, transliterate_gsm7,
+    )
+    from odoo.addons.gatewayapi_sms_iap.services.dispatch import cancel_messages, dispatch_batches, weighted_shares
+    from odoo.addons.gatewayapi_sms_iap.services.exceptions import ACCOUNT_ERROR_KINDS, GatewayApiError, classify_error
+    from odoo.addons.gatewayapi_sms_iap.services.metrics import get_metrics
+    from odoo.addons.gatewayapi_sms_iap.services.phone import normalize_msisdn
+    from odoo.addons.gatewayapi_sms_iap.services.scheduling import stagger_sendtimes
+    from odoo.addons.gatewayapi_sms_iap.services.templating import find_templates
+    from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_async_client import httpx, run_async_dispatch
+    from odoo.addons.gatewayapi_sms_iap.services.rate_limiting import get_rate_limiter
+    from odoo.addons.gatewayapi_sms_iap.services.resilience import (
+        CircuitBreaker, RetryPolicy, DEFAULT_MAX_RETRIES, DEFAULT_CIRCUIT_FAILURE_THRESHOLD, DEFAULT_CIRCUIT_RESET_TIMEOUT,
+    )
 except ImportError:
     _logger_init = logging.getLogger(__name__)
-    _logger_init.error("Failed to import GatewayApiClient or message_requires_ucs2 from services.")
+    _logger_init.error("Failed to import GatewayApiClient or analyze_messages from services.")
     GatewayApiClient = None
-    message_requires_ucs2 = None # Should not happen if services/gatewayapi_client.py is correct
+    analyze_messages = None # Should not happen if services/gatewayapi_client.py is correct
     DEFAULT_GATEWAYAPI_BASE_URL = "https://gatewayapi.eu" # Fallback
+    DEFAULT_MAX_RECIPIENTS_PER_REQUEST = 1000
+    DEFAULT_BATCH_MAX_MESSAGES = 500
+    DEFAULT_BATCH_MAX_BYTES = 1000000
+    DEFAULT_POOL_MAXSIZE = 10
+    batch_bounds = None
+    client_registry_stats = None
+    get_client = None
+    invalidate_client = None
+    transliterate_gsm7 = None
+    dispatch_batches = None
+    weighted_shares = None
+    cancel_messages = None
+    stagger_sendtimes = None
+    ACCOUNT_ERROR_KINDS = frozenset()
+    GatewayApiError = None
+    classify_error = None
+    get_metrics = None
+    normalize_msisdn = None
+    find_templates = None
+    httpx = None
+    run_async_dispatch = None
+    get_rate_limiter = None
+    CircuitBreaker = None
+    RetryPolicy = None
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+    DEFAULT_CIRCUIT_RESET_TIMEOUT = 60
 
 
 _logger = logging.getLogger(__name__)
 
+DEFAULT_BALANCE_TTL = 300 # Seconds
+DEFAULT_BALANCE_CHECK_WORKERS = 8
+DEFAULT_BALANCE_CHECK_TIME_BUDGET = 60 # Seconds, for all rest/me calls of one cron run
+# Result state of messages to suppressed numbers. Unknown to Odoo, which would fail them as
+# 'unknown': _sms_send writes their state itself and leaves them out of its results.
+SUPPRESSED_STATE = 'suppressed'
+
+
+def run_dispatch_plan(plan):
+    """Send the batches of a plan built by ``_gatewayapi_dispatch_plan`` and return the dispatch outcomes.
+
+    Does not touch the ORM, so plans of several providers can run in parallel threads.
+    """
+    client = plan['client']
+    if plan['async']:
+        return run_async_dispatch(client.api_token, client.base_url, plan['batches'],
+                                  max_in_flight=plan['max_workers'], rate_limiter=plan['rate_limiter'],
+                                  retry_policy=plan['retry_policy'], circuit_breaker=client.circuit_breaker,
+                                  metrics=client.metrics)
+    return dispatch_batches(client, plan['batches'], max_workers=plan['max_workers'],
+                            rate_limiter=plan['rate_limiter'], retry_policy=plan['retry_policy'])
+
+
 class IapAlternativeProvider(models.Model):
     _inherit = 'iap.alternative.provider'
 
@@ -36,6 +107,111 @@ class IapAlternativeProvider(models.Model):
     )
     gatewayapi_api_token = fields.Char(string=_("GatewayAPI API Token (Hidden)"), copy=False)
     gatewayapi_show_token = fields.Boolean(string=_("Show API Token"), default=False)
+    gatewayapi_default_country_code = fields.Char(
+        string=_("Default Country Code"),
+        help=_("Calling code (e.g. 45) added to numbers given without international prefix. "
+               "Leave empty if all numbers include their country code.")
+    )
+
+    gatewayapi_max_recipients_per_request = fields.Integer(
+        string=_("Max Recipients per Request"),
+        default=DEFAULT_MAX_RECIPIENTS_PER_REQUEST,
+        help=_("Messages with identical sender and content are sent as one GatewayAPI request "
+               "with up to this many recipients.")
+    )
+    gatewayapi_batch_mode = fields.Boolean(
+        string=_("Batch Submission"), default=False,
+        help=_("Pack messages with different content into bulk GatewayAPI requests instead of one request per message.")
+    )
+    gatewayapi_collapse_templates = fields.Boolean(
+        string=_("Collapse Personalised Messages"), default=False,
+        help=_("Detect messages rendered from a common template (e.g. differing only by name or date) and send "
+               "each template as one GatewayAPI message with per-recipient tag values, instead of one message "
+               "per text.")
+    )
+    gatewayapi_transliterate_gsm7 = fields.Boolean(
+        string=_("Replace Look-alike Characters"), default=False,
+        help=_("Replace typographic quotes, dashes, ellipses and special spaces (e.g. pasted from a word "
+               "processor) by their GSM-7 equivalents when that avoids sending the message as UCS-2, which "
+               "fits 70 instead of 160 characters per segment.")
+    )
+    gatewayapi_batch_max_messages = fields.Integer(string=_("Max Messages per Batch"), default=DEFAULT_BATCH_MAX_MESSAGES)
+    gatewayapi_batch_max_bytes = fields.Integer(string=_("Max Batch Size (bytes)"), default=DEFAULT_BATCH_MAX_BYTES)
+    gatewayapi_use_spool = fields.Boolean(
+        string=_("Send via Spool"), default=False,
+        help=_("Queue outgoing SMS and let a scheduled action send them in the background, so large sends "
+               "do not keep the sending user's request and transaction open.")
+    )
+    gatewayapi_max_concurrency = fields.Integer(
+        string=_("Concurrent Requests"), default=1,
+        help=_("Number of GatewayAPI requests sent in parallel by one send. 1 sends sequentially.")
+    )
+    gatewayapi_dispatch_mode = fields.Selection([
+        ('threads', _('Threads')), ('async', _('Asyncio'))], string=_("Dispatch Mode"), default='threads',
+        help=_("Asyncio keeps up to 'Concurrent Requests' submissions in flight from a single thread "
+               "and requires the 'httpx' Python library.")
+    )
+    gatewayapi_max_retries = fields.Integer(
+        string=_("Max Retries"), default=DEFAULT_MAX_RETRIES,
+        help=_("Number of times a request is retried after throttling (HTTP 429), a gateway error (502/503/504) "
+               "or a connection failure, with exponential backoff honouring Retry-After.")
+    )
+    gatewayapi_circuit_failure_threshold = fields.Integer(
+        string=_("Circuit Breaker Threshold"), default=DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        help=_("After this many consecutive failed requests, sending fails immediately until the cool-down "
+               "has passed. 0 disables the circuit breaker.")
+    )
+    gatewayapi_circuit_reset_timeout = fields.Integer(
+        string=_("Circuit Breaker Cool-down (seconds)"), default=DEFAULT_CIRCUIT_RESET_TIMEOUT,
+    )
+    gatewayapi_pool_maxsize = fields.Integer(
+        string=_("Connection Pool Size"), default=DEFAULT_POOL_MAXSIZE,
+        help=_("Number of keep-alive connections kept open to GatewayAPI by each Odoo process. "
+               "Raised automatically to the number of concurrent requests.")
+    )
+    gatewayapi_rate_limit = fields.Float(
+        string=_("Rate Limit (messages/second)"), default=0.0,
+        help=_("Maximum number of recipients submitted per second by this Odoo process. 0 disables the limit.")
+    )
+    gatewayapi_pool_provider_ids = fields.Many2many(
+        'iap.alternative.provider', 'gatewayapi_provider_pool_rel', 'provider_id', 'member_id',
+        string=_("Load-balancing Pool"), domain="[('provider', '=', 'gatewayapi'), ('id', '!=', id)]",
+        help=_("Other GatewayAPI providers (accounts) sharing the sends of this provider in proportion to their "
+               "pool weight. Messages of a provider that fails with throttling, an outage or an open circuit "
+               "breaker are sent by the remaining ones. All use this provider's sender name and suppression "
+               "list; the pools of the members themselves are ignored.")
+    )
+    gatewayapi_pool_weight = fields.Float(
+        string=_("Pool Weight"), default=1.0,
+        help=_("Share of a pooled send given to this provider, relative to the other pool members, e.g. its "
+               "throughput. Providers whose estimated balance is at or below the minimum credit limit get no "
+               "share while other members have credit.")
+    )
+
+    gatewayapi_webhook_secret = fields.Char(
+        string=_("Webhook Secret"), copy=False,
+        help=_("JWT secret configured on the GatewayAPI webhook. Delivery reports are read from the signed "
+               "X-Gwapi-Signature header; they are all rejected while no secret is set.")
+    )
+    gatewayapi_webhook_url = fields.Char(string=_("Delivery Report URL"), compute='_compute_gatewayapi_webhook_url')
+
+    gatewayapi_balance = fields.Float(string=_("Estimated Balance"), compute='_compute_gatewayapi_balance',
+        help=_("Last balance read from GatewayAPI minus the estimated cost of the SMS sent since."))
+    gatewayapi_balance_currency = fields.Char(string=_("Balance Currency"), compute='_compute_gatewayapi_balance')
+    gatewayapi_balance_date = fields.Datetime(string=_("Balance Reconciled On"), compute='_compute_gatewayapi_balance')
+    gatewayapi_balance_ttl = fields.Integer(
+        string=_("Balance Cache (seconds)"), default=DEFAULT_BALANCE_TTL,
+        help=_("How long the estimated balance is trusted before it is read again from GatewayAPI.")
+    )
+    gatewayapi_cost_per_segment = fields.Float(
+        string=_("Estimated Cost per SMS Segment"), digits=(16, 4), default=0.0,
+        help=_("Average price of one SMS segment in your GatewayAPI account currency, used to estimate "
+               "the balance between two reconciliations.")
+    )
+    gatewayapi_credit_gate = fields.Boolean(
+        string=_("Block Sends Exceeding Balance"), default=False,
+        help=_("Reject a whole send upfront when its estimated cost exceeds the estimated balance.")
+    )
 
     gatewayapi_check_balance_enabled = fields.Boolean(string=_("Enable GatewayAPI Balance Check"), default=False)
     gatewayapi_min_credit_limit = fields.Float(string=_("Minimum Credit Limit"), default=10.0)
@@ -54,6 +230,99 @@ class IapAlternativeProvider(models.Model):
         'res.users', 'iap_alt_provider_gatewayapi_notify_user_rel',
         'provider_id', 'user_id', string=_("Notify Users Directly"))
 
+    def _compute_gatewayapi_balance(self):
+        balances = self.env['gatewayapi.balance.ledger'].sudo()._get_balances(self.filtered('id'))
+        for record in self:
+            credits, currency, balance_date = balances.get(record.id) or (0.0, False, False)
+            record.gatewayapi_balance = credits
+            record.gatewayapi_balance_currency = currency
+            record.gatewayapi_balance_date = balance_date
+
+    def _compute_gatewayapi_webhook_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url', '')
+        for record in self:
+            record.gatewayapi_webhook_url = f"{base_url}/gatewayapi/status/{record.id}" if record.id else False
+
+    def write(self, vals):
+        # Cached clients are keyed by credentials; drop those this write makes stale.
+        stale_clients = set()
+        if 'gatewayapi_api_token' in vals or 'gatewayapi_base_url' in vals or 'provider' in vals:
+            stale_clients = {(record.gatewayapi_api_token, record.gatewayapi_base_url)
+                             for record in self if record.provider == 'gatewayapi' and record.gatewayapi_api_token}
+        res = super().write(vals)
+        if invalidate_client:
+            for api_token, base_url in stale_clients:
+                invalidate_client(api_token, base_url)
+        return res
+
+    def unlink(self):
+        stale_clients = {(record.gatewayapi_api_token, record.gatewayapi_base_url)
+                         for record in self if record.provider == 'gatewayapi' and record.gatewayapi_api_token}
+        res = super().unlink()
+        if invalidate_client:
+            for api_token, base_url in stale_clients:
+                invalidate_client(api_token, base_url)
+        return res
+
+    def action_gatewayapi_connection_stats(self):
+        self.ensure_one()
+        client = self._get_gatewayapi_client()
+        stats = client.connection_stats()
+        registry_stats = client_registry_stats()
+        message = _(
+            "Connections opened (handshakes): %(opened)s\n"
+            "Requests reusing a connection: %(reused)s of %(requests)s\n"
+            "Pool size: %(pool)s\n"
+            "Cached clients in this process: %(cached)s (created: %(created)s, reused: %(client_reused)s, "
+            "evicted: %(evicted)s, invalidated: %(invalidated)s)"
+        ) % {
+            'opened': stats['connections_opened'], 'reused': stats['connections_reused'],
+            'requests': stats['requests'], 'pool': stats['pool_maxsize'],
+            'cached': registry_stats['cached_clients'], 'created': registry_stats['created'],
+            'client_reused': registry_stats['reused'], 'evicted': registry_stats['evicted'],
+            'invalidated': registry_stats['invalidated'],
+        }
+        _logger.info("GatewayAPI connection stats for provider '%s': %s, registry: %s", self.name, stats, registry_stats)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {'title': _("GatewayAPI Connections"), 'message': message, 'sticky': True, 'type': 'info'},
+        }
+
+    def _gatewayapi_metrics(self):
+        """Return this process's ``GatewayApiMetrics`` of the provider's GatewayAPI account."""
+        self.ensure_one()
+        if not get_metrics:
+            raise UserError(_("Critical Error: GatewayAPI client library is not available."))
+        return get_metrics((self.gatewayapi_api_token, self.gatewayapi_base_url or DEFAULT_GATEWAYAPI_BASE_URL))
+
+    def action_gatewayapi_metrics(self):
+        self.ensure_one()
+        snapshot = self._gatewayapi_metrics().snapshot()
+        lines = []
+        for label, histogram in sorted(snapshot['latency'].items()):
+            statuses = ', '.join(f"{status}: {count}" for (status_label, status), count in sorted(snapshot['statuses'].items())
+                                 if status_label == label)
+            lines.append(_("%(endpoint)s: %(count)s request(s), p50 %(p50).0f ms, p99 %(p99).0f ms, max %(max).0f ms (%(statuses)s)") % {
+                'endpoint': label, 'count': histogram['count'], 'p50': histogram['p50'] * 1000,
+                'p99': histogram['p99'] * 1000, 'max': histogram['max'] * 1000, 'statuses': statuses,
+            })
+        for encoding, counters in sorted(snapshot['messages'].items()):
+            lines.append(_("%(encoding)s: %(messages)s message(s) to %(recipients)s recipient(s), %(segments)s segment(s)") % dict(
+                counters, encoding=encoding))
+        lines.append(_("Request bytes sent: %s") % snapshot['bytes_sent'])
+        if snapshot['transliterated']:
+            lines.append(_("Rewritten to GSM-7: %(messages)s message(s), %(segments)s segment(s) saved") % {
+                'messages': snapshot['transliterated'], 'segments': snapshot['segments_saved']})
+        if not snapshot['requests']:
+            lines.insert(0, _("No GatewayAPI request was made by this server process yet."))
+        _logger.info("GatewayAPI metrics for provider '%s': %s", self.name, snapshot)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {'title': _("GatewayAPI Metrics"), 'message': '\n'.join(lines), 'sticky': True, 'type': 'info'},
+        }
+
     def action_toggle_gatewayapi_token_visibility(self):
         self.ensure_one()
         self.gatewayapi_show_token = not self.gatewayapi_show_token
@@ -88,22 +357,24 @@ class IapAlternativeProvider(models.Model):
         if not GatewayApiClient: # Check if the class itself was imported
             _logger.critical("GatewayAPI client class (GatewayApiClient) is not loaded/imported.")
             raise UserError(_("Critical Error: GatewayAPI client library is not available."))
-        return GatewayApiClient(self.gatewayapi_api_token, self.gatewayapi_base_url)
+        return get_client(self.gatewayapi_api_token, self.gatewayapi_base_url,
+                          pool_maxsize=max(self.gatewayapi_pool_maxsize, self.gatewayapi_max_concurrency, 1),
+                          circuit_failure_threshold=self.gatewayapi_circuit_failure_threshold,
+                          circuit_reset_timeout=self.gatewayapi_circuit_reset_timeout)
+
+    def _get_gatewayapi_rate_limiter(self):
+        self.ensure_one()
+        return get_rate_limiter((self.env.cr.dbname, self.id), self.gatewayapi_rate_limit)
 
     def _map_gatewayapi_error_to_odoo_state(self, e, number=""):
-        error_text = str(e.args[0] if e.args else e) # Get the message from UserError
-        _logger.warning("Mapping GatewayAPI error for number %s: %s", number, error_text)
-
-        if "balance" in error_text.lower() or "credit" in error_text.lower() or "insufficient funds" in error_text.lower():
-            return 'insufficient_credit', error_text
-        if "msisdn" in error_text.lower() or "recipient" in error_text.lower() or "invalid number" in error_text.lower() or "number format" in error_text.lower() or "Invalid MSISDN" in error_text:
-            return 'wrong_number_format', error_text
-        if "authentication failed" in error_text.lower() or "unauthorized" in error_text.lower() or "token" in error_text.lower():
-            return 'server_error', _("Authentication error with GatewayAPI: %s") % error_text
-        if "sender" in error_text.lower() and ("invalid" in error_text.lower() or "not allowed" in error_text.lower()):
-            return 'server_error', _("Invalid or disallowed sender name: %s") % error_text
-        # Default fallback
-        return 'server_error', error_text
+        state, kind, error_text = classify_error(e) # Status code first, then precompiled message patterns
+        _logger.warning("Mapping GatewayAPI error for number %s: %s (status: %s, code: %s)", number, error_text,
+                        getattr(e, 'status_code', None), getattr(e, 'error_code', None))
+        if kind == 'authentication':
+            return state, _("Authentication error with GatewayAPI: %s") % error_text
+        if kind == 'sender':
+            return state, _("Invalid or disallowed sender name: %s") % error_text
+        return state, error_text
 
     def _sms_send(self, iap_account, messages, SudoUser=False):
         self.ensure_one()
@@ -117,47 +388,496 @@ class IapAlternativeProvider(models.Model):
             _logger.error("GatewayAPI Default Sender Name missing for provider '%s'", self.name)
             return [{'res_id': msg['res_id'], 'state': 'server_error', 'error_text': _("GatewayAPI Default Sender Name is not configured.")} for msg in messages]
 
+        if self.gatewayapi_credit_gate and not self.gatewayapi_pool_provider_ids: # Pools gate per member
+            rejected = self._gatewayapi_check_credit_gate(messages)
+            if rejected:
+                return rejected
+
+        if self.gatewayapi_use_spool:
+            return self.env['gatewayapi.sms.spool'].sudo()._enqueue(self, messages)
+        results = self._gatewayapi_send_messages(messages)
+        # Remember GatewayAPI ids so delivery reports can be matched to the SMS records.
+        self.env['sms.sms']._gatewayapi_link_message_ids({
+            result['res_id']: result['message_id_3rd_party'] for result in results if result.get('message_id_3rd_party')
+        })
+        suppressed_ids = [result['res_id'] for result in results if result['state'] == SUPPRESSED_STATE]
+        if suppressed_ids:
+            self.env['sms.sms']._gatewayapi_update_states(dict.fromkeys(suppressed_ids, ('error', 'sms_blacklist')))
+            results = [result for result in results if result['state'] != SUPPRESSED_STATE]
+        return results
+
+    def _gatewayapi_schedule_sms(self, sms_records, send_at, spread_seconds=0):
+        """Submit the outgoing ``sms_records`` now, for GatewayAPI to send at ``send_at`` (naive UTC).
+
+        Lets large campaigns be handed over off-peak instead of all at once when they are due.
+        With ``spread_seconds``, send times are staggered over that window. Accepted SMS get
+        their GatewayAPI id, provider and send time, so they can be cancelled until then, and
+        leave the outgoing queue; failures are written to the SMS. Returns ``_sms_send`` results.
+        """
+        self.ensure_one()
+        if self.provider != 'gatewayapi':
+            raise UserError(_("Only GatewayAPI providers can schedule SMS."))
+        if not self.gatewayapi_sender_name:
+            raise UserError(_("GatewayAPI Default Sender Name is not configured."))
+        if send_at <= fields.Datetime.now():
+            raise UserError(_("The scheduled send time must be in the future."))
+        sms_records = sms_records.filtered(lambda sms: sms.state == 'outgoing')
+        # Sorted by content, identical texts get the same send time and can share requests.
+        messages = sorted(({'res_id': sms.id, 'number': sms.number, 'content': sms.body} for sms in sms_records),
+                          key=lambda message_data: message_data['content'])
+        for message_data, sendtime in zip(messages, stagger_sendtimes(len(messages), send_at, spread_seconds)):
+            message_data['sendtime'] = sendtime
+        _logger.info("Scheduling %s SMS via GatewayAPI provider '%s' from %s over %s seconds.",
+                     len(messages), self.name, send_at, spread_seconds)
+
+        results = []
+        if self.gatewayapi_credit_gate and not self.gatewayapi_pool_provider_ids:
+            results = self._gatewayapi_check_credit_gate(messages)
+        results = results or self._gatewayapi_send_messages(messages)
+
+        SmsSms = self.env['sms.sms'].sudo()
+        SmsSms._gatewayapi_link_message_ids({
+            result['res_id']: result['message_id_3rd_party'] for result in results if result.get('message_id_3rd_party')
+        })
+        sendtimes = {message_data['res_id']: message_data['sendtime'] for message_data in messages}
+        ids_by_sendtime, updates = {}, {}
+        for result in results:
+            if result['state'] == 'success':
+                ids_by_sendtime.setdefault(sendtimes[result['res_id']], []).append(result['res_id'])
+                updates[result['res_id']] = (SmsSms._gatewayapi_scheduled_state(), False)
+            else:
+                updates[result['res_id']] = ('error', IAP_STATE_TO_SMS_FAILURE_TYPE.get(result['state'], 'sms_server'))
+        for sendtime, sms_ids in ids_by_sendtime.items():
+            SmsSms.browse(sms_ids).write({
+                'gatewayapi_provider_id': self.id,
+                'gatewayapi_scheduled_at': datetime.utcfromtimestamp(sendtime),
+            })
+        SmsSms._gatewayapi_update_states(updates)
+        return results
+
+    def _gatewayapi_cancel_scheduled_sms(self, sms_records):
+        """Cancel at GatewayAPI the messages of ``sms_records`` scheduled by this provider and not sent yet.
+
+        GatewayAPI cancels whole messages, so every SMS sharing a message id with one of
+        ``sms_records`` is cancelled with it. Returns ``(cancelled sms.sms, {message_id: error text})``.
+        """
+        self.ensure_one()
+        now = fields.Datetime.now()
+        message_ids = {
+            sms.gatewayapi_message_id for sms in sms_records
+            if sms.gatewayapi_provider_id == self and sms.gatewayapi_message_id
+            and sms.gatewayapi_scheduled_at and sms.gatewayapi_scheduled_at > now
+        }
+        SmsSms = self.env['sms.sms'].sudo()
+        if not message_ids:
+            return SmsSms, {}
+        errors = cancel_messages(self._get_gatewayapi_client(), message_ids,
+                                 max_workers=max(self.gatewayapi_max_concurrency, 1),
+                                 retry_policy=RetryPolicy(self.gatewayapi_max_retries))
+        cancelled = SmsSms.search([
+            ('gatewayapi_provider_id', '=', self.id),
+            ('gatewayapi_message_id', 'in', [message_id for message_id, error in errors.items() if error is None]),
+        ])
+        if cancelled:
+            cancelled.write({'gatewayapi_scheduled_at': False})
+            SmsSms._gatewayapi_update_states(dict.fromkeys(cancelled.ids, ('canceled', False)))
+        failed = {message_id: str(error.args[0] if error.args else error)
+                  for message_id, error in errors.items() if error is not None}
+        _logger.info("GatewayAPI provider '%s': cancelled %s scheduled message(s) (%s SMS), %s failed.",
+                     self.name, len(errors) - len(failed), len(cancelled), len(failed))
+        return cancelled, failed
+
+    def _gatewayapi_prepare_recipients(self, messages):
+        """Normalize numbers to E.164 and set aside invalid, suppressed and duplicate messages before sending.
+
+        Returns ``(to_send, results, duplicates)``: copies of the messages to send with normalized
+        numbers (and, with Replace Look-alike Characters, contents rewritten to GSM-7), the results
+        of invalid and suppressed messages, and ``{res_id: [res_id, ...]}`` listing for each message
+        sent the messages with the same normalized number and content it also stands for.
+        """
+        self.ensure_one()
+        default_country_code = self.gatewayapi_default_country_code or None
+        transliterate = self.gatewayapi_transliterate_gsm7
+        transliterated = {} # original content -> number of messages sent with it rewritten
+        suppression_index = self.env['gatewayapi.sms.suppression'].sudo()._get_suppression_index()
+        to_send, results, duplicates, first_res_ids = [], [], {}, {}
+        for message_data in messages:
+            number = normalize_msisdn(str(message_data['number']), default_country_code)
+            if not number:
+                results.append({'res_id': message_data['res_id'], 'state': 'wrong_number_format',
+                                'error_text': _("Invalid phone number: %s") % message_data['number']})
+            elif suppression_index.is_suppressed(self.id, number):
+                results.append({'res_id': message_data['res_id'], 'state': SUPPRESSED_STATE,
+                                'error_text': _("The number is on the GatewayAPI suppression list.")})
+            else:
+                content = message_data['content']
+                if transliterate and not message_data.get('template'): # Templates are sent as given
+                    content = transliterate_gsm7(content)
+                key = (number, content, message_data.get('sendtime'))
+                first_res_id = first_res_ids.get(key)
+                if first_res_id is None:
+                    first_res_ids[key] = message_data['res_id']
+                    to_send.append(dict(message_data, number=number, content=content))
+                    if content != message_data['content']:
+                        transliterated[message_data['content']] = transliterated.get(message_data['content'], 0) + 1
+                else:
+                    duplicates.setdefault(first_res_id, []).append(message_data['res_id'])
+        if results or duplicates:
+            _logger.info("GatewayAPI provider '%s': not sending %s invalid or suppressed and %s duplicate SMS.",
+                         self.name, len(results), sum(len(res_ids) for res_ids in duplicates.values()))
+        if transliterated:
+            self._gatewayapi_record_transliteration(transliterated)
+        return to_send, results, duplicates
+
+    def _gatewayapi_record_transliteration(self, transliterated):
+        """Log and count the segments saved by sending ``{original content: message count}`` rewritten to GSM-7."""
+        self.ensure_one()
+        rewritten = {content: transliterate_gsm7(content) for content in transliterated}
+        encodings = analyze_messages(list(rewritten) + list(rewritten.values()))
+        segments_saved = sum((encodings[content].segments - encodings[rewritten[content]].segments) * count
+                             for content, count in transliterated.items())
+        messages_count = sum(transliterated.values())
+        self._gatewayapi_metrics().record_transliteration(messages_count, segments_saved)
+        _logger.info("GatewayAPI provider '%s': %s SMS rewritten to GSM-7, saving %s segment(s).",
+                     self.name, messages_count, segments_saved)
+
+    def _gatewayapi_send_messages(self, messages):
+        """Send ``messages`` to GatewayAPI right away and return one result dict per ``res_id``.
+
+        Duplicates (same number and content) are sent once and share the result of that message.
+        """
+        self.ensure_one()
+        to_send, skipped_results, duplicates = self._gatewayapi_prepare_recipients(messages)
+        if not to_send:
+            results = []
+        elif self.gatewayapi_pool_provider_ids:
+            results = self._gatewayapi_submit_pooled(to_send)
+        else:
+            results = self._gatewayapi_submit(to_send)
+        for result in list(results):
+            for res_id in duplicates.get(result['res_id'], ()):
+                results.append(dict(result, res_id=res_id))
+        results.extend(skipped_results)
+        # Report results in the order the messages were given, whatever the grouping and dispatch order.
+        positions = {message_data['res_id']: index for index, message_data in enumerate(messages)}
+        results.sort(key=lambda result: positions.get(result['res_id'], 0))
+        return results
+
+    def _gatewayapi_submit(self, messages):
+        """Submit ``messages`` (with normalized, unique numbers) and return one result dict per ``res_id``."""
+        self.ensure_one()
+        plan, error_text = self._gatewayapi_dispatch_plan(messages)
+        if plan is None:
+            return [{'res_id': msg['res_id'], 'state': 'server_error', 'error_text': error_text} for msg in messages]
+        return self._gatewayapi_plan_results(plan, run_dispatch_plan(plan))
+
+    def _gatewayapi_dispatch_plan(self, messages, sender=None):
+        """Prepare the submission of ``messages`` by this provider, sent from ``sender`` (default: its own).
+
+        Returns ``(plan, error_text)``. The plan holds everything ``run_dispatch_plan`` needs to send
+        without ORM access; it is ``None``, with the reason in ``error_text``, when the provider
+        cannot send right now (no client, or its circuit breaker is open).
+        """
+        self.ensure_one()
         try:
             client = self._get_gatewayapi_client()
         except UserError as e: # Errors from _get_gatewayapi_client
             _logger.error("Failed to initialize GatewayAPI client for provider '%s': %s", self.name, e)
-            return [{'res_id': msg['res_id'], 'state': 'server_error', 'error_text': str(e.args[0] if e.args else e)} for msg in messages]
+            return None, str(e.args[0] if e.args else e)
+
+        if client.circuit_breaker.state == CircuitBreaker.OPEN:
+            _logger.warning("GatewayAPI circuit breaker is open for provider '%s'; not sending %s SMS.",
+                            self.name, len(messages))
+            return None, _("GatewayAPI is temporarily unavailable. Sending is paused, please try again later.")
+
+        sender = sender or self.gatewayapi_sender_name
+        units = []
+        for content, encoding, chunk, tags in self._gatewayapi_group_messages(messages):
+            tag_values = [[message_data['tag_values'][tag] for tag in tags] for message_data in chunk] if tags else None
+            units.append((client.build_sms_payload(sender, [message_data['number'] for message_data in chunk], content,
+                                                   encoding=encoding, tags=tags, tag_values=tag_values,
+                                                   sendtime=chunk[0].get('sendtime')), chunk))
+        if self.gatewayapi_batch_mode:
+            bounds = batch_bounds([payload for payload, chunk in units],
+                                  self.gatewayapi_batch_max_messages, self.gatewayapi_batch_max_bytes)
+        else:
+            bounds = [(index, index + 1) for index in range(len(units))]
 
+        use_async = self.gatewayapi_dispatch_mode == 'async' and httpx is not None
+        if self.gatewayapi_dispatch_mode == 'async' and not use_async:
+            _logger.warning("GatewayAPI provider '%s' is set to asyncio dispatch but 'httpx' is not installed. "
+                            "Falling back to threads.", self.name)
+        return {
+            'messages': messages,
+            'client': client,
+            'batches': [units[start:end] for start, end in bounds],
+            'max_workers': max(self.gatewayapi_max_concurrency, 1),
+            'rate_limiter': self._get_gatewayapi_rate_limiter(),
+            'retry_policy': RetryPolicy(self.gatewayapi_max_retries),
+            'async': use_async,
+        }, None
+
+    def _gatewayapi_plan_results(self, plan, outcomes):
+        """Turn the dispatch ``outcomes`` of ``plan`` into per-``res_id`` results and debit the balance ledger."""
+        self.ensure_one()
         results = []
-        for message_data in messages:
-            number = message_data['number']
-            content = message_data['content']
-            res_id = message_data['res_id']
-            log_prefix = f"SMS to {number} (res_id: {res_id}, provider: {self.name}):"
+        for outcome_units, api_response, error in outcomes:
+            results.extend(self._gatewayapi_outcome_results(outcome_units, api_response, error))
 
-            try:
-                api_response = client.send_sms(
-                    sender=self.gatewayapi_sender_name,
-                    recipients=[number],
-                    message_body=content
-                )
-                if api_response and isinstance(api_response.get('ids'), list) and api_response['ids']:
-                    message_id_3rd_party = str(api_response['ids'][0])
-                    results.append({
-                        'res_id': res_id,
-                        'state': 'success',
-                        'message_id_3rd_party': message_id_3rd_party
-                    })
-                    _logger.info("%s Successfully sent. GatewayAPI ID: %s", log_prefix, message_id_3rd_party)
+        if self.gatewayapi_cost_per_segment:
+            sent_res_ids = {result['res_id'] for result in results if result['state'] == 'success'}
+            self._gatewayapi_debit_balance(self._gatewayapi_estimate_cost(
+                [message_data for message_data in plan['messages'] if message_data['res_id'] in sent_res_ids]))
+        return results
+
+    def _gatewayapi_pool_members(self):
+        """Return this provider and its pool members able to send: GatewayAPI providers with an API token."""
+        self.ensure_one()
+        return (self | self.gatewayapi_pool_provider_ids).filtered(
+            lambda provider: provider.provider == 'gatewayapi' and provider.gatewayapi_api_token)
+
+    def _gatewayapi_pool_shares(self, messages):
+        """Return how many of ``messages`` each provider of ``self`` (pool members) should send.
+
+        Shares follow the pool weights. Members whose estimated balance is at or below their
+        minimum credit limit are left out unless all members are, and members blocking sends
+        exceeding their balance get no more than their balance is estimated to pay for.
+        """
+        encodings = analyze_messages(message_data['content'] for message_data in messages)
+        segments = sum(encodings[message_data['content']].segments for message_data in messages) / len(messages)
+        weights, capacities, low_credit = [], [], []
+        for member in self:
+            balance = member._gatewayapi_cached_balance()
+            credits = balance[0] if balance is not None else None
+            weights.append(max(member.gatewayapi_pool_weight, 0.0))
+            low_credit.append(credits is not None and credits <= member.gatewayapi_min_credit_limit)
+            if credits is not None and member.gatewayapi_credit_gate and member.gatewayapi_cost_per_segment:
+                capacities.append(max(int(credits / (member.gatewayapi_cost_per_segment * segments)), 0))
+            else:
+                capacities.append(None)
+        if not all(low for low, weight in zip(low_credit, weights) if weight > 0):
+            weights = [0.0 if low else weight for low, weight in zip(low_credit, weights)]
+        return weighted_shares(len(messages), weights, capacities)
+
+    def _gatewayapi_submit_pooled(self, messages):
+        """Submit ``messages`` spread over this provider and its pool members, failing over between them.
+
+        Each member's share is sent concurrently with the others. Messages whose submission
+        failed without reaching GatewayAPI (transient errors after the retries, open circuit
+        breaker), were refused for the member's account (credit, authentication) or whose member
+        cannot send at all are resent by the remaining members; the failing member is left out
+        for the rest of this send. Other errors are final, as the
+        message may have been accepted. Messages left over when the members' balances cannot pay
+        for them fail with ``insufficient_credit``, when no member has a positive pool weight
+        with ``server_error``.
+        """
+        self.ensure_one()
+        members = self._gatewayapi_pool_members()
+        # Sorting by content keeps identical texts with one member, so they still share requests.
+        pending = sorted(messages, key=lambda message_data: message_data['content'])
+        results, failed_results = [], {}
+        while pending and members:
+            shares = members._gatewayapi_pool_shares(pending)
+            plans, next_pending, start = [], [], 0
+            for member, share in zip(members, shares):
+                chunk, start = pending[start:start + share], start + share
+                if not chunk:
+                    continue
+                plan, error_text = member._gatewayapi_dispatch_plan(chunk, sender=self.gatewayapi_sender_name)
+                if plan is None:
+                    members -= member
+                    next_pending.extend(chunk)
+                    failed_results.update((message_data['res_id'], {
+                        'res_id': message_data['res_id'], 'state': 'server_error', 'error_text': error_text,
+                    }) for message_data in chunk)
                 else:
-                    error_text = _("Unknown or malformed success response from GatewayAPI: %s") % api_response
-                    results.append({'res_id': res_id, 'state': 'server_error', 'error_text': error_text})
-                    _logger.warning("%s Failed. %s", log_prefix, error_text)
-            except UserError as e: # Errors from client.send_sms
-                state, error_text_mapped = self._map_gatewayapi_error_to_odoo_state(e, number)
-                results.append({'res_id': res_id, 'state': state, 'error_text': error_text_mapped})
-                _logger.error("%s Failed. Mapped State: %s, Error: %s", log_prefix, state, error_text_mapped)
-            except Exception as e: # Other unexpected errors
-                error_text_generic = _("Unexpected error sending SMS: %s") % str(e)
-                results.append({'res_id': res_id, 'state': 'server_error', 'error_text': error_text_generic})
-                _logger.error("%s Failed with unexpected error. Error: %s", log_prefix, str(e), exc_info=True)
+                    plans.append((member, plan))
+            if not any(member.gatewayapi_pool_weight > 0 for member in members):
+                # No member left is given a share: report the last failure of each message, if any
+                results.extend(failed_results.get(message_data['res_id']) or {
+                    'res_id': message_data['res_id'], 'state': 'server_error',
+                    'error_text': _("No provider of the GatewayAPI pool able to send has a positive Pool Weight."),
+                } for message_data in pending[start:])
+            else:
+                results.extend({
+                    'res_id': message_data['res_id'], 'state': 'insufficient_credit',
+                    'error_text': _("The estimated cost exceeds the balances of the pooled GatewayAPI providers."),
+                } for message_data in pending[start:]) # No member can pay for these
+            if plans:
+                with ThreadPoolExecutor(max_workers=len(plans), thread_name_prefix='gatewayapi-pool') as executor:
+                    all_outcomes = list(executor.map(run_dispatch_plan, [plan for member, plan in plans]))
+            else:
+                all_outcomes = []
+            for (member, plan), outcomes in zip(plans, all_outcomes):
+                final_outcomes = []
+                for outcome in outcomes:
+                    outcome_units, api_response, error = outcome
+                    if isinstance(error, GatewayApiError) and (error.transient or error.kind in ACCOUNT_ERROR_KINDS):
+                        members -= member
+                        next_pending.extend(message_data for payload, chunk in outcome_units for message_data in chunk)
+                        failed_results.update((result['res_id'], result) for result in
+                                              member._gatewayapi_outcome_results(outcome_units, api_response, error))
+                    else:
+                        final_outcomes.append(outcome)
+                results.extend(member._gatewayapi_plan_results(plan, final_outcomes))
+            if next_pending and members:
+                _logger.warning("GatewayAPI pool of provider '%s': failing over %s SMS to %s.",
+                                self.name, len(next_pending), ', '.join(members.mapped('name')))
+            pending = next_pending
+        for message_data in pending: # Every member failed: report the last failure of each message
+            results.append(failed_results.get(message_data['res_id']) or {
+                'res_id': message_data['res_id'], 'state': 'server_error',
+                'error_text': _("No GatewayAPI provider of the pool is able to send."),
+            })
         return results
 
+    def _gatewayapi_estimate_cost(self, messages):
+        """Estimated price of ``messages``: segments per message times the configured cost per segment."""
+        self.ensure_one()
+        if not messages or not self.gatewayapi_cost_per_segment:
+            return 0.0
+        encodings = analyze_messages(message_data['content'] for message_data in messages)
+        segments = sum(encodings[message_data['content']].segments for message_data in messages)
+        return segments * self.gatewayapi_cost_per_segment
+
+    def _gatewayapi_debit_balance(self, amount):
+        """Record the estimated cost ``amount`` of SMS just handed over to GatewayAPI in the balance ledger."""
+        self.ensure_one()
+        if not amount or not self.gatewayapi_balance_date: # Nothing to debit before a first reconciliation
+            return
+        self.env['gatewayapi.balance.ledger'].sudo().create({'provider_id': self.id, 'kind': 'debit', 'amount': amount})
+        self.invalidate_recordset(['gatewayapi_balance'])
+        _logger.debug("GatewayAPI provider '%s': estimated balance debited by %s, now %s.",
+                      self.name, amount, self.gatewayapi_balance)
+
+    def _gatewayapi_store_balance(self, credits, currency):
+        """Reconcile the ledger of ``self`` with the balance just read from GatewayAPI (``rest/me``)."""
+        self.env['gatewayapi.balance.ledger'].sudo().create([{
+            'provider_id': provider.id, 'kind': 'reconcile', 'amount': credits, 'currency': currency,
+        } for provider in self])
+        self.invalidate_recordset(['gatewayapi_balance', 'gatewayapi_balance_currency', 'gatewayapi_balance_date'])
+
+    def _gatewayapi_cached_balance(self):
+        """Return the ledger's ``(credits, currency)`` while younger than the cache TTL, else ``None``."""
+        self.ensure_one()
+        balance_date = self.gatewayapi_balance_date
+        if balance_date and fields.Datetime.now() - balance_date < timedelta(seconds=self.gatewayapi_balance_ttl):
+            return self.gatewayapi_balance, self.gatewayapi_balance_currency
+        return None
+
+    def _gatewayapi_fetch_balance(self):
+        """Read ``(credits, currency)`` live from GatewayAPI (``rest/me``); raises ``UserError`` on failure."""
+        self.ensure_one()
+        balance_info = self._get_gatewayapi_client().get_balance()
+        credits = balance_info.get('credits')
+        currency = balance_info.get('currency')
+        if credits is None or not currency:
+            raise UserError(_("Unexpected balance response: %s") % balance_info)
+        return credits, currency
+
+    def _gatewayapi_get_balance(self):
+        """Return ``(credits, currency)`` from the ledger cache, reconciling it with GatewayAPI when stale."""
+        balance = self._gatewayapi_cached_balance()
+        if balance is None:
+            balance = self._gatewayapi_fetch_balance()
+            self._gatewayapi_store_balance(*balance)
+        return balance
+
+    def _gatewayapi_check_credit_gate(self, messages):
+        """Return ``insufficient_credit`` results for all ``messages`` if their estimated cost exceeds the balance.
+
+        Returns an empty list when the send may go ahead, including when the balance cannot be read.
+        """
+        self.ensure_one()
+        cost = self._gatewayapi_estimate_cost(messages)
+        if not cost:
+            return []
+        try:
+            credits, currency = self._gatewayapi_get_balance()
+        except UserError as e:
+            _logger.warning("GatewayAPI provider '%s': balance unavailable for the credit check, sending anyway: %s", self.name, e)
+            return []
+        if cost <= credits:
+            return []
+        error_text = _("Estimated cost %(cost).2f %(currency)s exceeds the GatewayAPI balance of %(credits).2f %(currency)s.") % {
+            'cost': cost, 'credits': credits, 'currency': currency or '',
+        }
+        _logger.warning("GatewayAPI provider '%s': rejecting %s SMS. %s", self.name, len(messages), error_text)
+        return [{'res_id': msg['res_id'], 'state': 'insufficient_credit', 'error_text': error_text} for msg in messages]
+
+    def _gatewayapi_outcome_results(self, units, api_response, error):
+        """Turn one dispatch outcome for ``units`` (a list of ``(payload, chunk)``) into per-``res_id`` results."""
+        recipient_count = sum(len(chunk) for payload, chunk in units)
+        log_prefix = f"SMS batch of {len(units)} message(s) to {recipient_count} recipient(s) (provider: {self.name}):"
+        if isinstance(error, UserError): # Errors from client.send_sms_batch
+            chunk = [message_data for payload, chunk in units for message_data in chunk]
+            state, error_text_mapped = self._map_gatewayapi_error_to_odoo_state(
+                error, ", ".join(str(message_data['number']) for message_data in chunk))
+            _logger.error("%s Failed. Mapped State: %s, Error: %s", log_prefix, state, error_text_mapped)
+            return [{'res_id': message_data['res_id'], 'state': state, 'error_text': error_text_mapped}
+                    for message_data in chunk]
+        if error is not None: # Other unexpected errors
+            error_text_generic = _("Unexpected error sending SMS: %s") % str(error)
+            _logger.error("%s Failed with unexpected error. Error: %s", log_prefix, str(error), exc_info=error)
+            return [{'res_id': message_data['res_id'], 'state': 'server_error', 'error_text': error_text_generic}
+                    for payload, chunk in units for message_data in chunk]
+
+        ids = api_response.get('ids') if isinstance(api_response, dict) else None
+        if not isinstance(ids, list) or len(ids) != len(units):
+            error_text = _("Unknown or malformed success response from GatewayAPI: %s") % api_response
+            _logger.warning("%s Failed. %s", log_prefix, error_text)
+            return [{'res_id': message_data['res_id'], 'state': 'server_error', 'error_text': error_text}
+                    for payload, chunk in units for message_data in chunk]
+
+        # GatewayAPI returns one id per message; all recipients of a message share it.
+        _logger.info("%s Successfully sent. GatewayAPI IDs: %s", log_prefix, ids)
+        return [{'res_id': message_data['res_id'], 'state': 'success', 'message_id_3rd_party': str(message_id)}
+                for message_id, (payload, chunk) in zip(ids, units) for message_data in chunk]
+
+    def _gatewayapi_group_messages(self, messages):
+        """Group messages by (sender, content, encoding) and split each group into recipient-capped chunks.
+
+        Returns a list of ``(content, encoding, chunk, tags)`` tuples where ``chunk`` is a list of the
+        original message dicts, in first-seen order, and ``tags`` is ``None``. The encoding is
+        computed once per unique content with ``analyze_messages``. Messages scheduled for
+        different times (``sendtime``) are never grouped together.
+
+        Messages carrying a ``template`` and its ``tag_values`` (``{tag: value}``) next to their
+        rendered ``content``, and with Collapse Personalised Messages those detected by
+        ``find_templates``, are grouped by template instead: ``content`` is then the template,
+        ``tags`` its tags and ``chunk`` holds message copies with their ``tag_values``.
+        """
+        self.ensure_one()
+        max_recipients = max(self.gatewayapi_max_recipients_per_request or DEFAULT_MAX_RECIPIENTS_PER_REQUEST, 1)
+        encodings = analyze_messages(message_data['content'] for message_data in messages)
+        templates = {}
+        if self.gatewayapi_collapse_templates:
+            templates = find_templates(message_data['content'] for message_data in messages
+                                       if not message_data.get('template'))
+        groups = {}
+        for message_data in messages:
+            content = message_data['content']
+            encoding = encodings[content].encoding
+            if message_data.get('template'):
+                key = (self.gatewayapi_sender_name, message_data['template'], encoding,
+                       tuple(sorted(message_data['tag_values'])))
+            elif content in templates:
+                template, tags, tag_values = templates[content]
+                message_data = dict(message_data, tag_values=dict(zip(tags, tag_values)))
+                key = (self.gatewayapi_sender_name, template, encoding, tuple(tags))
+            else:
+                key = (self.gatewayapi_sender_name, content, encoding, None)
+            groups.setdefault(key + (message_data.get('sendtime'),), []).append(message_data)
+
+        chunks = []
+        for (_sender, content, encoding, tags, _sendtime), group in groups.items():
+            for index in range(0, len(group), max_recipients):
+                chunks.append((content, encoding, group[index:index + max_recipients], tags and list(tags)))
+        if templates:
+            _logger.info("GatewayAPI provider '%s': %s distinct text(s) collapsed into %s template message(s).",
+                         self.name, len(templates), len({template for template, tags, tag_values in templates.values()}))
+        return chunks
+
     def check_credentials(self): # This method is called by the button in iap_alternative_provider
         self.ensure_one()
         if self.provider != 'gatewayapi':
@@ -173,6 +893,7 @@ class IapAlternativeProvider(models.Model):
 
             if credits is not None and currency:
                 message = _("Connection Successful!\nYour GatewayAPI Balance: %(credits)s %(currency)s") % {'credits': credits, 'currency': currency}
+                self._gatewayapi_store_balance(credits, currency)
                 self.gatewayapi_last_balance_check_result = _("OK (%(datetime)s): %(credits)s %(currency)s") % {
                     'datetime': fields.Datetime.now(), 'credits': credits, 'currency': currency
                 }
@@ -209,57 +930,130 @@ class IapAlternativeProvider(models.Model):
             return
 
         next_check_base = fields.Datetime.now() # Always schedule from now if this function is called
-        self.gatewayapi_next_balance_check = next_check_base + timedelta(
+        self.gatewayapi_next_balance_check = next_check_base + relativedelta(
             **{self.gatewayapi_check_interval_unit: self.gatewayapi_check_interval_qty}
         )
         _logger.info("GatewayAPI provider '%s': Next balance check scheduled for %s", self.name, self.gatewayapi_next_balance_check)
 
+    def _gatewayapi_next_balance_check_date(self, now):
+        """Return the next balance check datetime counted from ``now``, or ``False`` when checks are off."""
+        self.ensure_one()
+        if not (self.gatewayapi_check_balance_enabled and self.gatewayapi_check_interval_qty > 0
+                and self.gatewayapi_check_interval_unit):
+            return False
+        # relativedelta, unlike timedelta, supports the 'months' unit.
+        return now + relativedelta(**{self.gatewayapi_check_interval_unit: self.gatewayapi_check_interval_qty})
+
+    def _gatewayapi_fetch_balances(self, max_workers, time_budget):
+        """Read ``rest/me`` once per distinct (API token, base URL) among ``self``, concurrently.
+
+        Returns ``{provider_id: (credits, currency) or error text}``. Only the HTTP calls run in
+        worker threads; clients are resolved and responses parsed here, on the cron's cursor.
+        Accounts not answered within ``time_budget`` seconds are reported as timed out.
+        """
+        outcomes = {}
+        provider_ids_by_account = {}
+        for provider in self:
+            account = (provider.gatewayapi_api_token, provider.gatewayapi_base_url or DEFAULT_GATEWAYAPI_BASE_URL)
+            provider_ids_by_account.setdefault(account, []).append(provider.id)
+        providers_by_account = {account: self.browse(ids) for account, ids in provider_ids_by_account.items()}
+        clients = {}
+        for account, providers in providers_by_account.items():
+            try:
+                clients[account] = providers[0]._get_gatewayapi_client()
+            except UserError as e:
+                outcomes.update(dict.fromkeys(providers.ids, str(e.args[0] if e.args else e)))
+        if not clients:
+            return outcomes
+
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(clients)), thread_name_prefix='gatewayapi_balance')
+        try:
+            futures = {executor.submit(client.get_balance): account for account, client in clients.items()}
+            done, not_done = wait(futures, timeout=time_budget)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for future, account in futures.items():
+            provider_ids = providers_by_account[account].ids
+            if future in not_done:
+                outcome = _("No answer within the %s second balance check budget.") % time_budget
+            elif future.exception() is not None:
+                error = future.exception()
+                outcome = str(error.args[0] if isinstance(error, UserError) and error.args else error)
+            else:
+                balance_info = future.result()
+                credits, currency = balance_info.get('credits'), balance_info.get('currency')
+                if credits is None or not currency:
+                    outcome = _("Unexpected balance response: %s") % balance_info
+                else:
+                    outcome = (credits, currency)
+            outcomes.update(dict.fromkeys(provider_ids, outcome))
+        _logger.info("CRON: Read %s GatewayAPI balance(s) for %s provider(s), %s unanswered.",
+                     len(done), len(self), len(not_done))
+        return outcomes
+
     @api.model
-    def _cron_check_gatewayapi_balances(self):
+    def _cron_check_gatewayapi_balances(self, max_workers=DEFAULT_BALANCE_CHECK_WORKERS,
+                                        time_budget=DEFAULT_BALANCE_CHECK_TIME_BUDGET):
+        now = fields.Datetime.now()
         providers_to_check = self.search([
             ('provider', '=', 'gatewayapi'),
             ('gatewayapi_check_balance_enabled', '=', True),
-            ('gatewayapi_next_balance_check', '<=', fields.Datetime.now())
+            ('gatewayapi_next_balance_check', '<=', now)
         ])
         _logger.info("CRON: Checking GatewayAPI balances for %s provider(s).", len(providers_to_check))
+        if not providers_to_check:
+            return True
+
+        # Balances reconciled by a recent send are reused; the others are read from rest/me.
+        balances = {}
+        for provider_record in providers_to_check:
+            if provider_record.gatewayapi_balance_date and \
+                    now - provider_record.gatewayapi_balance_date < timedelta(seconds=provider_record.gatewayapi_balance_ttl):
+                balances[provider_record.id] = (provider_record.gatewayapi_balance, provider_record.gatewayapi_balance_currency)
+        to_fetch = providers_to_check.filtered(lambda p: p.id not in balances)
+        fetched = to_fetch._gatewayapi_fetch_balances(max_workers, time_budget) if to_fetch else {}
 
+        # Providers ending up with identical values (same account, same interval) share one write.
+        vals_groups = {}
+        reconciled = {} # (credits, currency) -> ids of the providers it was read for
+        low_credit = {}
         for provider_record in providers_to_check:
             log_prefix_cron = f"CRON Balance Check (Provider: {provider_record.name}):"
-            try:
-                client = provider_record._get_gatewayapi_client()
-                balance_info = client.get_balance()
-                credits = balance_info.get('credits')
-                currency = balance_info.get('currency')
-
-                if credits is not None and currency:
-                    provider_record.gatewayapi_last_balance_check_result = _("OK (%(datetime)s): %(credits)s %(currency)s") % {
-                        'datetime': fields.Datetime.now(), 'credits': credits, 'currency': currency
-                    }
-                    _logger.info("%s Success. Balance: %s %s", log_prefix_cron, credits, currency)
-                    if credits <= provider_record.gatewayapi_min_credit_limit:
-                        _logger.warning("%s LOW BALANCE DETECTED. Current: %s %s, Limit: %s",
-                                        log_prefix_cron, credits, currency, provider_record.gatewayapi_min_credit_limit)
-                        provider_record._send_gatewayapi_low_credit_notification(credits, currency)
-                else:
-                    error_msg_balance = _("Unexpected balance response: %s") % balance_info
-                    provider_record.gatewayapi_last_balance_check_result = _("Error (%(datetime)s): %(error_msg)s") % {
-                        'datetime': fields.Datetime.now(), 'error_msg': error_msg_balance
-                    }
-                    _logger.error("%s %s", log_prefix_cron, error_msg_balance)
-            except Exception as e: # Catch any exception during the check for a single provider
-                error_msg_exception = _("Error during balance check: %s") % str(e)
-                provider_record.gatewayapi_last_balance_check_result = _("Failed (%(datetime)s): %(error)s") % {
-                     'datetime': fields.Datetime.now(), 'error': error_msg_exception
+            vals = {'gatewayapi_next_balance_check': provider_record._gatewayapi_next_balance_check_date(now)}
+            outcome = balances.get(provider_record.id) or fetched.get(provider_record.id)
+            if isinstance(outcome, tuple):
+                credits, currency = outcome
+                vals['gatewayapi_last_balance_check_result'] = _("OK (%(datetime)s): %(credits)s %(currency)s") % {
+                    'datetime': now, 'credits': credits, 'currency': currency
+                }
+                if provider_record.id in fetched:
+                    reconciled.setdefault(outcome, []).append(provider_record.id)
+                _logger.info("%s Success. Balance: %s %s", log_prefix_cron, credits, currency)
+                if credits <= provider_record.gatewayapi_min_credit_limit:
+                    _logger.warning("%s LOW BALANCE DETECTED. Current: %s %s, Limit: %s",
+                                    log_prefix_cron, credits, currency, provider_record.gatewayapi_min_credit_limit)
+                    low_credit[provider_record.id] = outcome
+            else:
+                error_msg_exception = _("Error during balance check: %s") % outcome
+                vals['gatewayapi_last_balance_check_result'] = _("Failed (%(datetime)s): %(error)s") % {
+                     'datetime': now, 'error': error_msg_exception
                 }
-                _logger.error("%s %s", log_prefix_cron, error_msg_exception, exc_info=True)
-            finally:
-                # Always reschedule, even on error, to try again later.
-                provider_record._schedule_next_gatewayapi_balance_check(force_now=True)
+                _logger.error("%s %s", log_prefix_cron, error_msg_exception)
+            vals_groups.setdefault(tuple(sorted(vals.items())), []).append(provider_record.id)
+
+        # Always reschedule, even on error, to try again later.
+        for vals_items, provider_ids in vals_groups.items():
+            self.browse(provider_ids).write(dict(vals_items))
+        for (credits, currency), provider_ids in reconciled.items():
+            self.browse(provider_ids)._gatewayapi_store_balance(credits, currency)
+        if low_credit:
+            self.browse(list(low_credit))._send_gatewayapi_low_credit_notifications(low_credit)
         return True
 
-    def _send_gatewayapi_low_credit_notification(self, current_credits, currency):
+    def _gatewayapi_low_credit_message(self, current_credits, currency):
+        """Return the ``(subject, body_html)`` of the low credit alert for this provider."""
         self.ensure_one()
-        log_prefix_notify = f"Low Credit Notify (Provider: {self.name}):"
         subject = _("Low GatewayAPI Credit Alert for Provider: %s") % (self.gatewayapi_account_name or self.name)
         body_html = _(
             "<p>The GatewayAPI provider '<strong>%(provider_name)s</strong>' (used for SMS) has a low credit balance.</p>"
@@ -273,31 +1067,53 @@ class IapAlternativeProvider(models.Model):
             'limit': self.gatewayapi_min_credit_limit,
             'config_name': self.name
         }
+        return subject, body_html
+
+    def _send_gatewayapi_low_credit_notification(self, current_credits, currency):
+        self.ensure_one()
+        self._send_gatewayapi_low_credit_notifications({self.id: (current_credits, currency)})
+
+    def _send_gatewayapi_low_credit_notifications(self, balances):
+        """Alert about low credit for every provider in ``self``; ``balances`` maps provider ids to ``(credits, currency)``.
+
+        Each notification channel gets a single message covering all of its providers, users are
+        notified on each provider's own record.
+        """
         # Determine author for notifications (system user if from cron, otherwise current user)
         author_id = self.env.user.partner_id.id if self.env.user and self.env.user.exists() else self.env.ref('base.partner_root').id
 
-        if self.gatewayapi_notify_channel_id:
+        messages = {provider.id: provider._gatewayapi_low_credit_message(*balances[provider.id]) for provider in self}
+        for channel in self.mapped('gatewayapi_notify_channel_id'):
+            channel_providers = self.filtered(lambda p: p.gatewayapi_notify_channel_id == channel)
+            log_prefix_notify = f"Low Credit Notify (Providers: {', '.join(channel_providers.mapped('name'))}):"
+            if len(channel_providers) == 1:
+                subject, body_html = messages[channel_providers.id]
+            else:
+                subject = _("Low GatewayAPI Credit Alert for %s Providers") % len(channel_providers)
+                body_html = Markup('<hr/>').join(Markup(messages[provider.id][1]) for provider in channel_providers)
             try:
-                self.gatewayapi_notify_channel_id.with_context(mail_create_nosubscribe=True).message_post(
+                channel.with_context(mail_create_nosubscribe=True).message_post(
                     body=body_html, subject=subject, message_type='notification',
                     subtype_xmlid='mail.mt_comment', author_id=author_id
                 )
-                _logger.info("%s Sent notification to channel %s.", log_prefix_notify, self.gatewayapi_notify_channel_id.name)
+                _logger.info("%s Sent notification to channel %s.", log_prefix_notify, channel.name)
             except Exception as e:
                 _logger.error("%s Failed to send notification to channel %s: %s",
-                              log_prefix_notify, self.gatewayapi_notify_channel_id.name, e, exc_info=True)
+                              log_prefix_notify, channel.name, e, exc_info=True)
 
-        if self.gatewayapi_notify_user_ids:
-            partner_ids_to_notify = self.gatewayapi_notify_user_ids.mapped('partner_id').ids
+        for provider in self.filtered('gatewayapi_notify_user_ids'):
+            log_prefix_notify = f"Low Credit Notify (Provider: {provider.name}):"
+            partner_ids_to_notify = provider.gatewayapi_notify_user_ids.mapped('partner_id').ids
             if partner_ids_to_notify:
+                subject, body_html = messages[provider.id]
                 # Post a message on the provider record, which will notify followers (the users)
-                self.message_post(
+                provider.message_post(
                     body=body_html, subject=subject, partner_ids=partner_ids_to_notify, # Notifying partners directly
                     message_type='notification', # This creates mail.message records
                     subtype_xmlid='mail.mt_note', # A general note type, appears in inbox
                     author_id=author_id,
                 )
-                _logger.info("%s Sent direct notifications to users: %s.", log_prefix_notify, self.gatewayapi_notify_user_ids.mapped('name'))
+                _logger.info("%s Sent direct notifications to users: %s.", log_prefix_notify, provider.gatewayapi_notify_user_ids.mapped('name'))
 
     @api.constrains('gatewayapi_check_interval_qty', 'gatewayapi_check_interval_unit', 'gatewayapi_check_balance_enabled', 'provider')
     def _check_gatewayapi_interval(self):
@@ -308,6 +1124,56 @@ class IapAlternativeProvider(models.Model):
                 if record.gatewayapi_check_balance_enabled and not record.gatewayapi_check_interval_unit:
                     raise ValidationError(_("GatewayAPI Balance Check Interval Unit must be set if enabled."))
 
+    @api.constrains('provider', 'gatewayapi_max_recipients_per_request')
+    def _check_gatewayapi_max_recipients(self):
+        for record in self:
+            if record.provider == 'gatewayapi' and record.gatewayapi_max_recipients_per_request <= 0:
+                raise ValidationError(_("GatewayAPI Max Recipients per Request must be positive."))
+
+    @api.constrains('provider', 'gatewayapi_batch_mode', 'gatewayapi_batch_max_messages', 'gatewayapi_batch_max_bytes')
+    def _check_gatewayapi_batch_limits(self):
+        for record in self:
+            if record.provider == 'gatewayapi' and record.gatewayapi_batch_mode and \
+               (record.gatewayapi_batch_max_messages <= 0 or record.gatewayapi_batch_max_bytes <= 0):
+                raise ValidationError(_("GatewayAPI batch limits must be positive when Batch Submission is enabled."))
+
+    @api.constrains('provider', 'gatewayapi_max_concurrency', 'gatewayapi_rate_limit', 'gatewayapi_pool_maxsize',
+                    'gatewayapi_max_retries', 'gatewayapi_circuit_failure_threshold', 'gatewayapi_circuit_reset_timeout',
+                    'gatewayapi_balance_ttl', 'gatewayapi_cost_per_segment')
+    def _check_gatewayapi_dispatch_limits(self):
+        for record in self:
+            if record.provider == 'gatewayapi':
+                if record.gatewayapi_max_concurrency <= 0:
+                    raise ValidationError(_("GatewayAPI Concurrent Requests must be at least 1."))
+                if record.gatewayapi_rate_limit < 0:
+                    raise ValidationError(_("GatewayAPI Rate Limit cannot be negative."))
+                if record.gatewayapi_pool_maxsize <= 0:
+                    raise ValidationError(_("GatewayAPI Connection Pool Size must be at least 1."))
+                if record.gatewayapi_balance_ttl < 0 or record.gatewayapi_cost_per_segment < 0:
+                    raise ValidationError(_("GatewayAPI balance cache and cost per segment cannot be negative."))
+                if record.gatewayapi_max_retries < 0 or record.gatewayapi_circuit_failure_threshold < 0 \
+                   or record.gatewayapi_circuit_reset_timeout < 0:
+                    raise ValidationError(_("GatewayAPI retry and circuit breaker settings cannot be negative."))
+
+    @api.constrains('provider', 'gatewayapi_pool_provider_ids', 'gatewayapi_pool_weight')
+    def _check_gatewayapi_pool(self):
+        for record in self:
+            if record.provider == 'gatewayapi':
+                if record.gatewayapi_pool_weight < 0:
+                    raise ValidationError(_("GatewayAPI Pool Weight cannot be negative."))
+                if record in record.gatewayapi_pool_provider_ids:
+                    raise ValidationError(_("A GatewayAPI provider cannot be a member of its own pool."))
+                if record.gatewayapi_pool_provider_ids.filtered(lambda member: member.provider != 'gatewayapi'):
+                    raise ValidationError(_("Only GatewayAPI providers can be members of a GatewayAPI pool."))
+
+    @api.constrains('provider', 'gatewayapi_default_country_code')
+    def _check_gatewayapi_default_country_code(self):
+        for record in self:
+            code = record.gatewayapi_default_country_code
+            if record.provider == 'gatewayapi' and code and \
+               not (code.isdigit() and code.isascii() and 1 <= len(code) <= 3 and not code.startswith('0')):
+                raise ValidationError(_("GatewayAPI Default Country Code must be a calling code of 1 to 3 digits, without '+' or '00' (e.g. 45)."))
+
     @api.constrains('provider', 'gatewayapi_sender_name')
     def _check_gatewayapi_sender_name(self):
         for record in self:
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from psycopg2.extras import execute_values
+
+from odoo import models, fields, _
+
+_logger = logging.getLogger(__name__)
+
+
+class SmsSms(models.Model):
+    _inherit = 'sms.sms'
+
+    gatewayapi_message_id = fields.Char(string=_("GatewayAPI Message ID"), index=True, copy=False, readonly=True)
+    gatewayapi_provider_id = fields.Many2one('iap.alternative.provider', string=_("GatewayAPI Provider"),
+                                             ondelete='set null', copy=False, readonly=True)
+    gatewayapi_scheduled_at = fields.Datetime(string=_("GatewayAPI Scheduled Send Time"), index=True, copy=False,
+                                              readonly=True)
+
+    def _gatewayapi_link_message_ids(self, message_ids):
+        """Store GatewayAPI message ids (``{sms_id: message_id}``) on the SMS records in one UPDATE.
+
+        Recipients of one multi-recipient message share its id; delivery reports are
+        told apart by their number.
+        """
+        values = [(int(sms_id), str(message_id)) for sms_id, message_id in message_ids.items() if sms_id and message_id]
+        if not values:
+            return
+        self.flush_model(['gatewayapi_message_id'])
+        execute_values(self.env.cr._obj, """
+            UPDATE sms_sms
+               SET gatewayapi_message_id = data.message_id
+              FROM (VALUES %s) AS data(id, message_id)
+             WHERE sms_sms.id = data.id
+        """, values, page_size=1000)
+        self.invalidate_model(['gatewayapi_message_id'])
+
+    def _gatewayapi_scheduled_state(self):
+        """State of SMS handed over to GatewayAPI for later sending: ``pending`` where it exists (Odoo 17), else ``sent``."""
+        valid_states = {value for value, _label in self._fields['state']._description_selection(self.env)}
+        return 'pending' if 'pending' in valid_states else 'sent'
+
+    def action_gatewayapi_cancel_scheduled(self):
+        """Cancel the GatewayAPI messages of the selected SMS that are scheduled and not sent yet."""
+        cancelled, failed = self.browse(), {}
+        for provider in self.gatewayapi_provider_id:
+            provider_cancelled, provider_failed = provider._gatewayapi_cancel_scheduled_sms(
+                self.filtered(lambda sms: sms.gatewayapi_provider_id == provider))
+            cancelled |= provider_cancelled
+            failed.update(provider_failed)
+        message = _("%(cancelled)s scheduled SMS cancelled.") % {'cancelled': len(cancelled)}
+        if failed:
+            message += "\n" + _("Could not cancel %(count)s message(s): %(errors)s") % {
+                'count': len(failed), 'errors': '; '.join(sorted(set(failed.values()))),
+            }
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {'title': _("GatewayAPI Scheduled SMS"), 'message': message, 'sticky': bool(failed),
+                       'type': 'warning' if failed else 'success'},
+        }
+
+    def _gatewayapi_failure_type(self, failure_type):
+        """Return ``failure_type`` if this Odoo version knows it, else the generic server failure."""
+        valid_failure_types = {value for value, _label in self._fields['failure_type']._description_selection(self.env)}
+        return failure_type if failure_type in valid_failure_types else 'sms_server'
+
+    def _gatewayapi_update_states(self, updates):
+        """Apply ``updates`` (``{sms_id: (state, failure_type)}``) with one write per distinct value pair.
+
+        Records deleted in the meantime (sent SMS are usually garbage-collected) are skipped.
+        """
+        ids_by_values = {}
+        for sms_id, (state, failure_type) in updates.items():
+            if failure_type:
+                failure_type = self._gatewayapi_failure_type(failure_type)
+            ids_by_values.setdefault((state, failure_type), []).append(sms_id)
+        for (state, failure_type), sms_ids in ids_by_values.items():
+            records = self.sudo().browse(sms_ids).exists()
+            if not records:
+                continue
+            if hasattr(records, '_update_sms_state_and_trackers'):
+                # Also updates the mail notifications linked to the SMS (Odoo 17).
+                records._update_sms_state_and_trackers(state, failure_type=failure_type)
+            else:
+                records.write({'state': state, 'failure_type': failure_type})
+            _logger.info("Updated %s SMS record(s) to state '%s' (%s).", len(records), state, failure_type or '-')
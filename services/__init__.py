@@ -1,2 +1,12 @@
 # -*- coding: utf-8 -*-
+from . import exceptions
+from . import resilience
+from . import metrics
+from . import phone
+from . import suppression
+from . import scheduling
+from . import templating
 from . import gatewayapi_client
+from . import rate_limiting
+from . import dispatch
+from . import gatewayapi_async_client
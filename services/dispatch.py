@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo.exceptions import UserError
+
+from .exceptions import GatewayApiCircuitOpenError, GatewayApiError, GatewayApiTransientError
+
+_logger = logging.getLogger(__name__)
+
+
+def submit_units(client, units, rate_limiter=None, retry_policy=None):
+    """Submit ``units`` (a list of ``(payload, chunk)``) to GatewayAPI in one request.
+
+    Returns a list of ``(units, response, error)`` outcomes. Transient failures are
+    retried following ``retry_policy`` and throttling slows ``rate_limiter`` down.
+    When a multi-message batch is rejected for its content it is split in halves and
+    resubmitted, so a single bad message only fails its own unit instead of the whole
+    batch. Other permanent errors (authentication, credit, or a timeout after which the
+    batch may have been accepted) fail the batch without resending it. Runs without
+    any ORM access so it can be used from worker threads.
+    """
+    recipient_count = sum(len(payload['recipients']) for payload, chunk in units)
+    attempt = 0
+    while True:
+        if rate_limiter:
+            rate_limiter.acquire(recipient_count)
+        try:
+            response = client.send_sms_batch([payload for payload, chunk in units])
+        except GatewayApiTransientError as e:
+            if rate_limiter and e.status_code == 429:
+                rate_limiter.on_throttle(e.retry_after)
+            if retry_policy and attempt < retry_policy.max_retries:
+                delay = retry_policy.delay(attempt, e.retry_after)
+                attempt += 1
+                _logger.warning("GatewayAPI request for %s message(s) failed (%s). Retry %s/%s in %.1f seconds.",
+                                len(units), e, attempt, retry_policy.max_retries, delay)
+                time.sleep(delay)
+                continue
+            return [(units, None, e)]
+        except GatewayApiCircuitOpenError as e:
+            return [(units, None, e)]
+        except UserError as e:
+            if len(units) > 1 and (not isinstance(e, GatewayApiError) or e.message_specific):
+                _logger.warning("GatewayAPI batch of %s messages failed (%s). Splitting batch to isolate the failing message(s).",
+                                len(units), e)
+                middle = len(units) // 2
+                return (submit_units(client, units[:middle], rate_limiter, retry_policy)
+                        + submit_units(client, units[middle:], rate_limiter, retry_policy))
+            return [(units, None, e)]
+        except Exception as e: # Unexpected errors are reported per unit by the caller
+            return [(units, None, e)]
+        if rate_limiter:
+            rate_limiter.on_success()
+        return [(units, response, None)]
+
+
+def dispatch_batches(client, batches, max_workers=1, rate_limiter=None, retry_policy=None):
+    """Submit every batch of units, on a bounded thread pool when ``max_workers`` > 1.
+
+    Outcomes are returned in batch order whatever the completion order.
+    """
+    def submit(batch):
+        return submit_units(client, batch, rate_limiter, retry_policy)
+
+    if max_workers <= 1 or len(batches) <= 1:
+        outcomes = [submit(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches)), thread_name_prefix='gatewayapi') as executor:
+            outcomes = list(executor.map(submit, batches))
+    return [outcome for batch_outcomes in outcomes for outcome in batch_outcomes]
+
+
+def weighted_shares(total, weights, capacities=None):
+    """Split ``total`` items into integer shares proportional to ``weights`` (largest remainder method).
+
+    No share exceeds its entry in ``capacities`` (``None`` means unlimited); what does not fit
+    is spread over the others. The shares add up to less than ``total`` only when the
+    capacities leave no room for the rest.
+    """
+    capacities = capacities or [None] * len(weights)
+    shares = [0] * len(weights)
+    remaining = total
+    while remaining > 0:
+        open_indexes = [index for index, weight in enumerate(weights)
+                        if weight > 0 and (capacities[index] is None or shares[index] < capacities[index])]
+        if not open_indexes:
+            break
+        weight_total = sum(weights[index] for index in open_indexes)
+        quotas = {index: remaining * weights[index] / weight_total for index in open_indexes}
+        allotted = {index: int(quotas[index]) for index in open_indexes}
+        leftover = remaining - sum(allotted.values())
+        for index in sorted(open_indexes, key=lambda index: quotas[index] - allotted[index], reverse=True)[:leftover]:
+            allotted[index] += 1
+        for index in open_indexes:
+            if capacities[index] is not None:
+                allotted[index] = min(allotted[index], capacities[index] - shares[index])
+            shares[index] += allotted[index]
+            remaining -= allotted[index]
+    return shares
+
+
+def cancel_messages(client, message_ids, max_workers=1, retry_policy=None):
+    """Cancel the scheduled messages ``message_ids`` with one ``DELETE rest/mtsms/<id>`` each.
+
+    Cancellations are sent on a bounded thread pool when ``max_workers`` > 1, and transient
+    failures are retried following ``retry_policy`` (cancelling twice is harmless). Returns
+    ``{message_id: error}`` with ``None`` for the messages cancelled. Runs without ORM access.
+    """
+    def cancel(message_id):
+        attempt = 0
+        while True:
+            try:
+                client.cancel_scheduled_sms(message_id)
+                return None
+            except GatewayApiTransientError as e:
+                if retry_policy and attempt < retry_policy.max_retries:
+                    time.sleep(retry_policy.delay(attempt, e.retry_after))
+                    attempt += 1
+                    continue
+                return e
+            except Exception as e: # Reported per message by the caller
+                return e
+
+    message_ids = list(dict.fromkeys(message_ids))
+    if max_workers <= 1 or len(message_ids) <= 1:
+        errors = [cancel(message_id) for message_id in message_ids]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(message_ids)), thread_name_prefix='gatewayapi') as executor:
+            errors = list(executor.map(cancel, message_ids))
+    return dict(zip(message_ids, errors))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import re
+from functools import lru_cache
+
+from odoo.exceptions import UserError
+
+CLASSIFY_CACHE_SIZE = 1024
+
+# Status codes of requests GatewayAPI refused because of their content: when a batch gets one,
+# a single message may be at fault, so the batch is split to isolate it.
+REJECTED_REQUEST_STATUS_CODES = frozenset({400, 422})
+AUTHENTICATION_STATUS_CODES = frozenset({401, 403})
+INSUFFICIENT_CREDIT_STATUS_CODES = frozenset({402})
+
+# (_sms_send state, kind, pattern) tried in order on the error message; kinds affecting the whole
+# account (credit, authentication) are never fixed by resending part of a batch.
+_ERROR_PATTERNS = (
+    ('insufficient_credit', 'credit', re.compile(r'balance|credit|insufficient funds', re.IGNORECASE)),
+    ('wrong_number_format', 'number', re.compile(r'msisdn|recipient|invalid number|number format', re.IGNORECASE)),
+    ('server_error', 'authentication', re.compile(r'authentication failed|unauthorized|token', re.IGNORECASE)),
+    ('server_error', 'sender', re.compile(r'sender.*(?:invalid|not allowed)|(?:invalid|not allowed).*sender',
+                                          re.IGNORECASE | re.DOTALL)),
+)
+ACCOUNT_ERROR_KINDS = frozenset({'credit', 'authentication'})
+
+
+class GatewayApiError(UserError):
+    """A failed GatewayAPI request.
+
+    ``status_code`` is the HTTP status (``None`` when no response was received), ``error_code``
+    the GatewayAPI error code of the response body, if any. ``transient`` errors did not reach
+    GatewayAPI or were refused for now (throttling, gateway errors) and are safe to resend;
+    other errors are permanent, or may hide an accepted message, and must not be resent.
+    """
+
+    transient = False
+
+    def __init__(self, message, status_code=None, error_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+
+    @property
+    def kind(self):
+        """What the error is about: ``'credit'``, ``'authentication'``, ``'number'``, ``'sender'`` or ``None``."""
+        return classify_error(self)[1]
+
+    @property
+    def message_specific(self):
+        """True when the request was refused for its content, so one message of a batch may be at fault."""
+        return self.status_code in REJECTED_REQUEST_STATUS_CODES and self.kind not in ACCOUNT_ERROR_KINDS
+
+
+class GatewayApiTransientError(GatewayApiError):
+    """A GatewayAPI failure that is safe to retry: throttling, gateway errors or a connection
+    that never reached the server. ``retry_after`` holds the server's Retry-After hint in seconds."""
+
+    transient = True
+
+    def __init__(self, message, status_code=None, retry_after=None, error_code=None):
+        super().__init__(message, status_code=status_code, error_code=error_code)
+        self.retry_after = retry_after
+
+
+class GatewayApiCircuitOpenError(GatewayApiError):
+    """Raised without any network call while the circuit breaker considers GatewayAPI unavailable."""
+
+    transient = True
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def _classify_message(error_text):
+    for state, kind, pattern in _ERROR_PATTERNS:
+        if pattern.search(error_text):
+            return state, kind
+    return 'server_error', None
+
+
+def classify_error(error):
+    """Return ``(state, kind, error_text)`` for ``error``: its ``_sms_send`` result state, what it is
+    about (see ``GatewayApiError.kind``) and its message.
+
+    The HTTP status decides when it is unambiguous, else the message is matched against
+    precompiled patterns. Results are cached per message, as a mass send with bad numbers
+    fails many requests with the same text.
+    """
+    error_text = str(error.args[0] if error.args else error)
+    status_code = getattr(error, 'status_code', None)
+    if status_code in AUTHENTICATION_STATUS_CODES:
+        return 'server_error', 'authentication', error_text
+    if status_code in INSUFFICIENT_CREDIT_STATUS_CODES:
+        return 'insufficient_credit', 'credit', error_text
+    state, kind = _classify_message(error_text)
+    return state, kind, error_text
+
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import _
+from odoo.exceptions import UserError, ValidationError
+
+from .exceptions import GatewayApiCircuitOpenError, GatewayApiError, GatewayApiTransientError
+from .gatewayapi_client import (
+    DEFAULT_GATEWAYAPI_BASE_URL, DEFAULT_POOL_MAXSIZE, LOGGED_BODY_MAX_LENGTH, build_sms_payload, encode_request_body,
+    http_error_details, record_sent_messages,
+)
+from .metrics import GatewayApiMetrics, DEFAULT_PAYLOAD_LOG_SAMPLE_RATE, STATUS_CONNECTION_ERROR, STATUS_TIMEOUT
+from .resilience import CircuitBreaker, IDEMPOTENT_METHODS, RETRYABLE_STATUS_CODES, parse_retry_after
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2 # noqa: F401 - only needed for httpx HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncGatewayApiClient:
+    """Asyncio counterpart of ``GatewayApiClient`` built on ``httpx``.
+
+    Connections are kept alive for the lifetime of the client and HTTP/2 is used when
+    the ``h2`` package is installed. Use it as an async context manager so the
+    connection pool is closed with the event loop that owns it. Pass the circuit
+    breaker and metrics of the account's cached ``GatewayApiClient`` so both clients share them.
+    """
+
+    def __init__(self, api_token, base_url=None, max_connections=DEFAULT_POOL_MAXSIZE, timeout=20, circuit_breaker=None,
+                 metrics=None):
+        if not api_token:
+            raise ValidationError(_("GatewayAPI API Token is required."))
+        if httpx is None:
+            raise UserError(_("The 'httpx' Python library is required for asynchronous GatewayAPI sending."))
+        self.api_token = api_token
+        self.base_url = base_url or DEFAULT_GATEWAYAPI_BASE_URL
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = metrics or GatewayApiMetrics()
+        self.payload_log_sample_rate = DEFAULT_PAYLOAD_LOG_SAMPLE_RATE
+        self.client = httpx.AsyncClient(
+            auth=(self.api_token, ''),
+            headers={'Accept': 'application/json', 'Content-Type': 'application/json'},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            http2=HTTP2_AVAILABLE,
+            timeout=timeout,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _request(self, method, endpoint, payload=None, params=None):
+        url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+        permit = self.circuit_breaker.allow_request()
+        if not permit:
+            _logger.warning("GatewayAPI circuit breaker is open, not sending: %s %s", method, url)
+            raise GatewayApiCircuitOpenError(_("GatewayAPI is temporarily unavailable. Sending is paused, please try again later."))
+        body = encode_request_body(payload)
+        log_bodies = _logger.isEnabledFor(logging.DEBUG) and random.random() < self.payload_log_sample_rate
+        if log_bodies:
+            _logger.debug("GatewayAPI Request: Method=%s, URL=%s, Payload=%s, Params=%s",
+                          method, url, body[:LOGGED_BODY_MAX_LENGTH].decode('utf-8', 'replace') if body else "None", params)
+        status = STATUS_CONNECTION_ERROR
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, content=body, params=params)
+            status = response.status_code
+            if log_bodies:
+                _logger.debug("GatewayAPI Response: Status=%s, URL=%s, Response Body=%s",
+                              response.status_code, response.url, response.text[:LOGGED_BODY_MAX_LENGTH])
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            error_msg, error_code = http_error_details(e.response)
+            _logger.error(error_msg)
+            status_code = e.response.status_code
+            if status_code >= 500: # Server side failures count for the breaker, retried or not
+                self.circuit_breaker.record_failure()
+            elif status_code != 429: # Throttling means the service is up, but says nothing of its health
+                self.circuit_breaker.record_success()
+            if status_code in RETRYABLE_STATUS_CODES:
+                raise GatewayApiTransientError(error_msg, status_code=status_code, error_code=error_code,
+                                               retry_after=parse_retry_after(e.response.headers.get('Retry-After')))
+            raise GatewayApiError(error_msg, status_code=status_code, error_code=error_code)
+        except httpx.TimeoutException as e:
+            status = STATUS_TIMEOUT
+            self.circuit_breaker.record_failure()
+            _logger.error("GatewayAPI Request Timeout: %s %s", method, url)
+            error_msg = _("GatewayAPI Connection Timeout. Please try again later.")
+            # A read timeout on a POST may hide an accepted message: do not offer it for retry.
+            if method in IDEMPOTENT_METHODS or isinstance(e, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+                raise GatewayApiTransientError(error_msg)
+            raise GatewayApiError(error_msg)
+        except httpx.HTTPError as e:
+            self.circuit_breaker.record_failure()
+            _logger.error("GatewayAPI Connection Error: %s", e)
+            error_msg = _("GatewayAPI Connection Error: %s") % e
+            if method in IDEMPOTENT_METHODS or isinstance(e, httpx.ConnectError):
+                raise GatewayApiTransientError(error_msg)
+            raise GatewayApiError(error_msg)
+        finally:
+            if permit is not True: # This request is the half-open probe
+                self.circuit_breaker.release_probe(permit)
+            self.metrics.record_request(method, endpoint, status, time.monotonic() - started, len(body) if body else 0)
+        self.circuit_breaker.record_success()
+        return response.json() if response.content else {} # DELETE answers 204 No Content
+
+    async def get_balance(self):
+        return await self._request('GET', 'rest/me')
+
+    def build_sms_payload(self, sender, recipients, message_body, encoding=None, tags=None, tag_values=None,
+                          sendtime=None):
+        return build_sms_payload(sender, recipients, message_body, encoding=encoding, tags=tags, tag_values=tag_values,
+                                 sendtime=sendtime)
+
+    async def send_sms(self, sender, recipients, message_body, encoding=None, tags=None, tag_values=None, sendtime=None):
+        payload = self.build_sms_payload(sender, recipients, message_body, encoding=encoding, tags=tags,
+                                         tag_values=tag_values, sendtime=sendtime)
+        response = await self._request('POST', 'rest/mtsms', payload=payload)
+        record_sent_messages(self.metrics, [payload])
+        return response
+
+    async def cancel_scheduled_sms(self, message_id):
+        return await self._request('DELETE', f'rest/mtsms/{message_id}')
+
+    async def send_sms_batch(self, payloads):
+        response = await self._request('POST', 'rest/mtsms', payload=payloads[0] if len(payloads) == 1 else payloads)
+        record_sent_messages(self.metrics, payloads)
+        return response
+
+
+async def submit_units_async(client, units, semaphore, rate_limiter=None, retry_policy=None):
+    """Async version of ``dispatch.submit_units``, holding ``semaphore`` while a request is in flight."""
+    recipient_count = sum(len(payload['recipients']) for payload, chunk in units)
+    attempt = 0
+    while True:
+        if rate_limiter:
+            await rate_limiter.acquire_async(recipient_count)
+        try:
+            async with semaphore:
+                response = await client.send_sms_batch([payload for payload, chunk in units])
+        except GatewayApiTransientError as e:
+            if rate_limiter and e.status_code == 429:
+                rate_limiter.on_throttle(e.retry_after)
+            if retry_policy and attempt < retry_policy.max_retries:
+                delay = retry_policy.delay(attempt, e.retry_after)
+                attempt += 1
+                _logger.warning("GatewayAPI request for %s message(s) failed (%s). Retry %s/%s in %.1f seconds.",
+                                len(units), e, attempt, retry_policy.max_retries, delay)
+                await asyncio.sleep(delay)
+                continue
+            return [(units, None, e)]
+        except GatewayApiCircuitOpenError as e:
+            return [(units, None, e)]
+        except UserError as e:
+            if len(units) > 1 and (not isinstance(e, GatewayApiError) or e.message_specific):
+                _logger.warning("GatewayAPI batch of %s messages failed (%s). Splitting batch to isolate the failing message(s).",
+                                len(units), e)
+                middle = len(units) // 2
+                halves = await asyncio.gather(
+                    submit_units_async(client, units[:middle], semaphore, rate_limiter, retry_policy),
+                    submit_units_async(client, units[middle:], semaphore, rate_limiter, retry_policy),
+                )
+                return halves[0] + halves[1]
+            return [(units, None, e)]
+        except Exception as e: # Unexpected errors are reported per unit by the caller
+            return [(units, None, e)]
+        if rate_limiter:
+            rate_limiter.on_success()
+        return [(units, response, None)]
+
+
+async def dispatch_batches_async(api_token, base_url, batches, max_in_flight=DEFAULT_POOL_MAXSIZE, rate_limiter=None,
+                                 retry_policy=None, circuit_breaker=None, metrics=None):
+    """Submit every batch with at most ``max_in_flight`` requests running at once; outcomes keep batch order."""
+    max_in_flight = max(max_in_flight, 1)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    async with AsyncGatewayApiClient(api_token, base_url, max_connections=max_in_flight,
+                                     circuit_breaker=circuit_breaker, metrics=metrics) as client:
+        outcomes = await asyncio.gather(*(
+            submit_units_async(client, batch, semaphore, rate_limiter, retry_policy) for batch in batches
+        ))
+    return [outcome for batch_outcomes in outcomes for outcome in batch_outcomes]
+
+
+def run_async_dispatch(api_token, base_url, batches, max_in_flight=DEFAULT_POOL_MAXSIZE, rate_limiter=None,
+                       retry_policy=None, circuit_breaker=None, metrics=None):
+    """Synchronous bridge to ``dispatch_batches_async`` for callers such as ``_sms_send``.
+
+    Runs a private event loop; when the calling thread already runs one, the loop is
+    started in a helper thread instead.
+    """
+    coroutine = dispatch_batches_async(api_token, base_url, batches, max_in_flight, rate_limiter,
+                                       retry_policy, circuit_breaker, metrics)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='gatewayapi-async') as executor:
+        return executor.submit(asyncio.run, coroutine).result()
@@ -1,11 +1,31 @@
 # -*- coding: utf-8 -*-
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 import json
 import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
 from odoo import _ # Import _ for translations
-from odoo.exceptions import UserError, ValidationError
+from odoo.exceptions import ValidationError
+
+from .exceptions import GatewayApiCircuitOpenError, GatewayApiError, GatewayApiTransientError
+from .metrics import (
+    GatewayApiMetrics, get_metrics, DEFAULT_PAYLOAD_LOG_SAMPLE_RATE, STATUS_CONNECTION_ERROR, STATUS_TIMEOUT,
+)
+from .resilience import CircuitBreaker, IDEMPOTENT_METHODS, RETRYABLE_STATUS_CODES, parse_retry_after
+from .templating import render_template
 
 DEFAULT_GATEWAYAPI_BASE_URL = "https://gatewayapi.eu"
+DEFAULT_MAX_RECIPIENTS_PER_REQUEST = 1000
+DEFAULT_BATCH_MAX_MESSAGES = 500
+DEFAULT_BATCH_MAX_BYTES = 1000000
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CLIENT_IDLE_TIMEOUT = 300 # Seconds before an unused cached client is closed
+LOGGED_BODY_MAX_LENGTH = 2000 # Characters of a sampled request/response body written to the debug log
 _logger = logging.getLogger(__name__)
 
 GSM7_BASIC_CHARS = (
@@ -15,90 +35,423 @@ GSM7_BASIC_CHARS = (
 GSM7_EXTENDED_CHARS = "^{}\\[~]|€"
 ALL_GSM7_CHARS = GSM7_BASIC_CHARS + GSM7_EXTENDED_CHARS
 
-def message_requires_ucs2(message_text):
+# Lookup sets built once at import; the escape character itself is not sendable text.
+GSM7_BASIC_SET = frozenset(GSM7_BASIC_CHARS) - {"\x1b"}
+GSM7_EXTENDED_SET = frozenset(GSM7_EXTENDED_CHARS)
+GSM7_SET = GSM7_BASIC_SET | GSM7_EXTENDED_SET
+
+# Characters often pasted from word processors, with the GSM-7 text carrying the same meaning.
+# Letters are left alone: replacing an accented letter could change a word or a name.
+GSM7_TRANSLITERATIONS = {
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'", "\u2032": "'", "\u00b4": "'", "`": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"', "\u2033": '"', "\u00ab": '"', "\u00bb": '"',
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2015": "-", "\u2212": "-",
+    "\u00a0": " ", "\u2002": " ", "\u2003": " ", "\u2007": " ", "\u2008": " ", "\u2009": " ", "\u200a": " ",
+    "\u202f": " ", "\u3000": " ", "\u2026": "...", "\u2022": "-", "\u00b7": "-",
+    "\u200b": "", "\u200c": "", "\u00ad": "", "\u2060": "", "\ufeff": "", # Invisible characters
+}
+GSM7_TRANSLITERATION_TABLE = str.maketrans(GSM7_TRANSLITERATIONS)
+GSM7_TRANSLITERATION_CACHE_SIZE = 4096
+
+GSM7_SINGLE_SEGMENT_LENGTH = 160
+GSM7_CONCAT_SEGMENT_LENGTH = 153
+UCS2_SINGLE_SEGMENT_LENGTH = 70
+UCS2_CONCAT_SEGMENT_LENGTH = 67
+
+MessageEncoding = namedtuple('MessageEncoding', ['encoding', 'length', 'segments'])
+
+def analyze_message(message_text):
+    """Return the ``MessageEncoding`` (encoding, length, segments) of ``message_text``.
+
+    For GSM-7 the length is in septets, extended characters counting double; for
+    UCS-2 it is in UTF-16 code units, so characters outside the BMP (most emojis)
+    count double. Segments follow the 160/153 and 70/67 concatenation rules.
+    """
     if not message_text:
-        return False
+        return MessageEncoding("GSM7", 0, 1)
+    chars = set(message_text)
+    if chars <= GSM7_SET:
+        length = len(message_text)
+        for char in chars & GSM7_EXTENDED_SET:
+            length += message_text.count(char)
+        encoding, single, concat = "GSM7", GSM7_SINGLE_SEGMENT_LENGTH, GSM7_CONCAT_SEGMENT_LENGTH
+    else:
+        length = len(message_text.encode('utf-16-le')) // 2
+        encoding, single, concat = "UCS2", UCS2_SINGLE_SEGMENT_LENGTH, UCS2_CONCAT_SEGMENT_LENGTH
+    segments = 1 if length <= single else -(-length // concat)
+    return MessageEncoding(encoding, length, segments)
+
+def analyze_messages(message_texts):
+    """Classify many messages in one pass; returns a dict mapping each unique text to its ``MessageEncoding``."""
+    analyzed = {}
+    for message_text in message_texts:
+        if message_text not in analyzed:
+            analyzed[message_text] = analyze_message(message_text)
+    return analyzed
+
+@lru_cache(maxsize=GSM7_TRANSLITERATION_CACHE_SIZE)
+def transliterate_gsm7(message_text):
+    """Return ``message_text`` with look-alike characters replaced by GSM-7 ones (see ``GSM7_TRANSLITERATIONS``).
+
+    The text is only rewritten when that makes all of it GSM-7, saving the switch to UCS-2;
+    otherwise, e.g. with an emoji left, it is returned unchanged.
+    """
+    if not message_text or set(message_text) <= GSM7_SET:
+        return message_text
+    transliterated = message_text.translate(GSM7_TRANSLITERATION_TABLE)
+    return transliterated if set(transliterated) <= GSM7_SET else message_text
+
+def message_requires_ucs2(message_text):
+    requires_ucs2 = analyze_message(message_text).encoding == "UCS2"
+    if requires_ucs2 and _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug("Message contains characters outside the GSM-7 alphabet, requires UCS-2.")
+    return requires_ucs2
+
+def payload_size(payload):
+    """Approximate size in bytes of ``payload`` once serialized as a request body."""
+    return len(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+def batch_bounds(payloads, max_messages=DEFAULT_BATCH_MAX_MESSAGES, max_bytes=DEFAULT_BATCH_MAX_BYTES):
+    """Split ``payloads`` into consecutive batches limited by message count and body size.
+
+    Returns a list of ``(start, end)`` slice bounds. A single payload larger than
+    ``max_bytes`` still gets a batch of its own.
+    """
+    max_messages = max(max_messages or DEFAULT_BATCH_MAX_MESSAGES, 1)
+    max_bytes = max(max_bytes or DEFAULT_BATCH_MAX_BYTES, 1)
+    bounds = []
+    start, batch_bytes = 0, 2 # Enclosing brackets of the JSON list
+    for index, payload in enumerate(payloads):
+        size = payload_size(payload) + 1 # Separating comma
+        if index > start and (index - start >= max_messages or batch_bytes + size > max_bytes):
+            bounds.append((start, index))
+            start, batch_bytes = index, 2
+        batch_bytes += size
+    if start < len(payloads):
+        bounds.append((start, len(payloads)))
+    return bounds
+
+def http_error_details(response):
+    """Return the user-facing error message and the GatewayAPI error code of a failed HTTP ``response``.
+
+    Works with any response object exposing ``status_code``, ``text`` and ``json()``
+    (``requests`` and ``httpx`` alike). The error code is ``None`` when the body has none.
+    """
+    error_msg_detail = response.text
+    error_code = None
     try:
-        message_text.encode('ascii')
-        for char in message_text:
-            if char not in ALL_GSM7_CHARS:
-                _logger.debug(f"Character '{char}' (ord: {ord(char)}) requires UCS-2 as it's not in simplified GSM-7 set.")
-                return True
-        return False
-    except UnicodeEncodeError:
-        _logger.debug(f"Message contains non-ASCII characters (e.g., emojis), requires UCS-2.")
-        return True
+        error_json = response.json()
+        if isinstance(error_json, dict):
+            error_code = error_json.get('code')
+            if 'message' in error_json: error_msg_detail = error_json['message']
+            elif 'detail' in error_json: error_msg_detail = error_json['detail']
+            elif 'variables' in error_json and isinstance(error_json['variables'], list) and error_json['variables']:
+                first_var_error = next((var.get('message') for var in error_json['variables'] if 'message' in var), None)
+                if first_var_error: error_msg_detail = first_var_error
+        elif isinstance(error_json, list) and error_json:
+             first_error = error_json[0]
+             if isinstance(first_error, dict) and 'message' in first_error: error_msg_detail = first_error['message']
+             else: error_msg_detail = str(first_error)
+    except (ValueError, TypeError): pass # json.JSONDecodeError is a ValueError
+    message = _("GatewayAPI HTTP Error: %(status_code)s - %(detail)s") % {'status_code': response.status_code, 'detail': error_msg_detail}
+    return message, str(error_code) if error_code is not None else None
+
+def http_error_message(response):
+    """Build the user-facing error message for a failed GatewayAPI HTTP ``response``."""
+    return http_error_details(response)[0]
+
+def message_segments(message_text, encoding):
+    """Number of segments ``message_text`` is billed as when sent with ``encoding``."""
+    analysis = analyze_message(message_text)
+    if encoding == "UCS2" and analysis.encoding != "UCS2":
+        length = len(message_text.encode('utf-16-le')) // 2
+        return 1 if length <= UCS2_SINGLE_SEGMENT_LENGTH else -(-length // UCS2_CONCAT_SEGMENT_LENGTH)
+    return analysis.segments
+
+def record_sent_messages(metrics, payloads):
+    """Count the messages, recipients and segments of ``payloads`` accepted by GatewayAPI, per encoding."""
+    per_encoding = {}
+    for payload in payloads:
+        encoding = payload.get('encoding') or "GSM7"
+        recipients = len(payload['recipients'])
+        counters = per_encoding.setdefault(encoding, [0, 0, 0])
+        counters[0] += 1
+        counters[1] += recipients
+        if payload.get('tags'): # Each recipient gets its own rendering of the template
+            counters[2] += sum(message_segments(render_template(payload['message'], payload['tags'], recipient['tagvalues']),
+                                                encoding) for recipient in payload['recipients'])
+        else:
+            counters[2] += message_segments(payload['message'], encoding) * recipients
+    for encoding, (messages, recipients, segments) in per_encoding.items():
+        metrics.record_messages(encoding, messages, recipients, segments)
+
+def encode_request_body(payload):
+    """Serialize ``payload`` once as the compact JSON request body (``None`` when there is no payload)."""
+    if payload is None:
+        return None
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def _connection_never_established(error):
+    """True when a ``requests`` connection error happened before anything was sent to the server."""
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def build_sms_payload(sender, recipients, message_body, encoding=None, tags=None, tag_values=None, sendtime=None):
+    """Build the ``rest/mtsms`` message object for ``message_body`` sent to ``recipients``.
+
+    With ``tags``, ``message_body`` is a template: GatewayAPI replaces each tag by the
+    recipient's entry of ``tag_values`` (one list of values per recipient, in ``tags``
+    order). Pass the ``encoding`` then, as it depends on the values too. With ``sendtime``
+    (Unix time), GatewayAPI holds the message and sends it at that time.
+    """
+    if not isinstance(recipients, list):
+        recipients = [recipients]
+    if encoding is None:
+        encoding = analyze_message(message_body).encoding
+    payload = {
+        "sender": sender,
+        "message": message_body,
+        "recipients": [{"msisdn": str(number)} for number in recipients],
+        "encoding": encoding,
+        "class": "standard",
+    }
+    if tags:
+        if tag_values is None or len(tag_values) != len(recipients):
+            raise ValidationError(_("Tag values must be given for every recipient of a template message."))
+        payload["tags"] = list(tags)
+        for recipient, values in zip(payload["recipients"], tag_values):
+            recipient["tagvalues"] = [str(value) for value in values]
+    if sendtime:
+        payload["sendtime"] = int(sendtime)
+    return payload
 
 class GatewayApiClient:
-    def __init__(self, api_token, base_url=None):
+    def __init__(self, api_token, base_url=None, pool_maxsize=None, metrics=None):
         if not api_token:
             raise ValidationError(_("GatewayAPI API Token is required."))
         self.api_token = api_token
         self.base_url = base_url or DEFAULT_GATEWAYAPI_BASE_URL
         self.session = requests.Session()
         self.session.auth = (self.api_token, '')
+        self.pool_maxsize = 0
+        self.last_used = time.monotonic()
+        self._closed_connection_stats = {'connections': 0, 'requests': 0}
+        self._adapter = None
+        self.resize_pool(pool_maxsize or DEFAULT_POOL_MAXSIZE)
+        self.circuit_breaker = CircuitBreaker()
+        self.metrics = metrics or GatewayApiMetrics()
+        self.payload_log_sample_rate = DEFAULT_PAYLOAD_LOG_SAMPLE_RATE
+
+    def resize_pool(self, pool_maxsize):
+        """Mount a keep-alive connection pool holding up to ``pool_maxsize`` connections.
+
+        One pool is shared by all dispatch threads, so it must be at least as large as
+        the send concurrency for no thread to wait for a connection.
+        """
+        if pool_maxsize == self.pool_maxsize:
+            return
+        old_adapter = self._adapter
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        self.pool_maxsize = pool_maxsize
+        if old_adapter:
+            self._collect_connection_stats(old_adapter)
+            old_adapter.close()
+
+    def _collect_connection_stats(self, adapter):
+        stats = self._adapter_connection_stats(adapter)
+        self._closed_connection_stats['connections'] += stats['connections']
+        self._closed_connection_stats['requests'] += stats['requests']
+
+    @staticmethod
+    def _adapter_connection_stats(adapter):
+        pools = adapter.poolmanager.pools
+        connections = requests_count = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                requests_count += pool.num_requests
+        return {'connections': connections, 'requests': requests_count}
+
+    def connection_stats(self):
+        """Return how many connections (TCP+TLS handshakes) were opened and how many requests reused one."""
+        stats = self._adapter_connection_stats(self._adapter)
+        connections = stats['connections'] + self._closed_connection_stats['connections']
+        requests_count = stats['requests'] + self._closed_connection_stats['requests']
+        return {
+            'connections_opened': connections,
+            'requests': requests_count,
+            'connections_reused': max(requests_count - connections, 0),
+            'pool_maxsize': self.pool_maxsize,
+        }
+
+    def close(self):
+        self.session.close()
 
     def _request(self, method, endpoint, payload=None, params=None):
+        self.last_used = time.monotonic()
         url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+        permit = self.circuit_breaker.allow_request()
+        if not permit:
+            _logger.warning("GatewayAPI circuit breaker is open, not sending: %s %s", method, url)
+            raise GatewayApiCircuitOpenError(_("GatewayAPI is temporarily unavailable. Sending is paused, please try again later."))
         headers = {
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         }
-        _logger.debug("GatewayAPI Request: Method=%s, URL=%s, Headers=%s, Payload=%s, Params=%s",
-                      method, url, headers, json.dumps(payload) if payload else "None", params)
+        body = encode_request_body(payload)
+        # Bodies are only logged for a sample of the requests, and only formatted when DEBUG is on.
+        log_bodies = _logger.isEnabledFor(logging.DEBUG) and random.random() < self.payload_log_sample_rate
+        if log_bodies:
+            _logger.debug("GatewayAPI Request: Method=%s, URL=%s, Payload=%s, Params=%s",
+                          method, url, body[:LOGGED_BODY_MAX_LENGTH].decode('utf-8', 'replace') if body else "None", params)
+        status = STATUS_CONNECTION_ERROR
+        started = time.monotonic()
         try:
-            response = self.session.request(method, url, json=payload, params=params, headers=headers, timeout=20)
-            _logger.debug("GatewayAPI Response: Status=%s, URL=%s, Response Body=%s",
-                          response.status_code, response.url, response.text)
+            response = self.session.request(method, url, data=body, params=params, headers=headers, timeout=20)
+            status = response.status_code
+            if log_bodies:
+                _logger.debug("GatewayAPI Response: Status=%s, URL=%s, Response Body=%s",
+                              response.status_code, response.url, response.text[:LOGGED_BODY_MAX_LENGTH])
             response.raise_for_status()
-            return response.json()
         except requests.exceptions.HTTPError as e:
-            error_msg_detail = e.response.text
-            try:
-                error_json = e.response.json()
-                if isinstance(error_json, dict):
-                    if 'message' in error_json: error_msg_detail = error_json['message']
-                    elif 'detail' in error_json: error_msg_detail = error_json['detail']
-                    elif 'variables' in error_json and isinstance(error_json['variables'], list) and error_json['variables']:
-                        first_var_error = next((var.get('message') for var in error_json['variables'] if 'message' in var), None)
-                        if first_var_error: error_msg_detail = first_var_error
-                elif isinstance(error_json, list) and error_json:
-                     first_error = error_json[0]
-                     if isinstance(first_error, dict) and 'message' in first_error: error_msg_detail = first_error['message']
-                     else: error_msg_detail = str(first_error)
-            except (json.JSONDecodeError, TypeError): pass
-            error_msg = _("GatewayAPI HTTP Error: %(status_code)s - %(detail)s") % {'status_code': e.response.status_code, 'detail': error_msg_detail}
+            error_msg, error_code = http_error_details(e.response)
             _logger.error(error_msg)
-            raise UserError(error_msg)
-        except requests.exceptions.Timeout:
+            status_code = e.response.status_code
+            if status_code >= 500: # Server side failures count for the breaker, retried or not
+                self.circuit_breaker.record_failure()
+            elif status_code != 429: # Throttling means the service is up, but says nothing of its health
+                self.circuit_breaker.record_success()
+            if status_code in RETRYABLE_STATUS_CODES:
+                raise GatewayApiTransientError(error_msg, status_code=status_code, error_code=error_code,
+                                               retry_after=parse_retry_after(e.response.headers.get('Retry-After')))
+            raise GatewayApiError(error_msg, status_code=status_code, error_code=error_code)
+        except requests.exceptions.Timeout as e:
+            status = STATUS_TIMEOUT
+            self.circuit_breaker.record_failure()
             _logger.error("GatewayAPI Request Timeout: %s %s", method, url)
-            raise UserError(_("GatewayAPI Connection Timeout. Please try again later."))
+            error_msg = _("GatewayAPI Connection Timeout. Please try again later.")
+            # A read timeout on a POST may hide an accepted message: do not offer it for retry.
+            if method in IDEMPOTENT_METHODS or isinstance(e, requests.exceptions.ConnectTimeout):
+                raise GatewayApiTransientError(error_msg)
+            raise GatewayApiError(error_msg)
         except requests.exceptions.RequestException as e:
+            self.circuit_breaker.record_failure()
             _logger.error("GatewayAPI Connection Error: %s", e)
-            raise UserError(_("GatewayAPI Connection Error: %s") % e)
+            error_msg = _("GatewayAPI Connection Error: %s") % e
+            if method in IDEMPOTENT_METHODS or _connection_never_established(e):
+                raise GatewayApiTransientError(error_msg)
+            raise GatewayApiError(error_msg)
+        finally:
+            if permit is not True: # This request is the half-open probe
+                self.circuit_breaker.release_probe(permit)
+            self.metrics.record_request(method, endpoint, status, time.monotonic() - started, len(body) if body else 0)
+        self.circuit_breaker.record_success()
+        return response.json() if response.content else {} # DELETE answers 204 No Content
 
     def get_balance(self):
         return self._request('GET', 'rest/me')
 
-    def send_sms(self, sender, recipients, message_body):
-        if not isinstance(recipients, list):
-            recipients = [recipients]
+    def build_sms_payload(self, sender, recipients, message_body, encoding=None, tags=None, tag_values=None,
+                          sendtime=None):
+        return build_sms_payload(sender, recipients, message_body, encoding=encoding, tags=tags, tag_values=tag_values,
+                                 sendtime=sendtime)
 
-        payload = {
-            "sender": sender,
-            "message": message_body,
-            "recipients": [{"msisdn": str(number)} for number in recipients]
-        }
+    def send_sms(self, sender, recipients, message_body, encoding=None, tags=None, tag_values=None, sendtime=None):
+        """Send one message to one or more recipients in a single ``rest/mtsms`` call.
+
+        GatewayAPI returns one id per message, so every recipient of this call
+        shares the id found in ``response['ids'][0]``. ``message_body`` may be a
+        template personalised per recipient with ``tags`` and ``tag_values``. With
+        ``sendtime`` (Unix time) the message is scheduled and can be cancelled with
+        ``cancel_scheduled_sms`` until then.
+        """
+        payload = self.build_sms_payload(sender, recipients, message_body, encoding=encoding, tags=tags,
+                                         tag_values=tag_values, sendtime=sendtime)
+        _logger.debug("Sending message to %s recipient(s) with %s encoding. Sending with class: %s.",
+                      len(payload['recipients']), payload["encoding"], payload["class"])
+        response = self._request('POST', 'rest/mtsms', payload=payload)
+        record_sent_messages(self.metrics, [payload])
+        return response
 
-        if message_requires_ucs2(message_body):
-            payload["encoding"] = "UCS2"
-            payload["class"] = "standard"
-            _logger.info("Message for %s requires UCS-2 encoding. Sending with class: %s.",
-                         [r['msisdn'] for r in payload['recipients']], payload["class"])
+    def cancel_scheduled_sms(self, message_id):
+        """Cancel the scheduled message ``message_id`` for all its recipients (``DELETE rest/mtsms/<id>``)."""
+        return self._request('DELETE', f'rest/mtsms/{message_id}')
+
+    def send_sms_batch(self, payloads):
+        """Submit several message payloads (see ``build_sms_payload``) in one ``rest/mtsms`` call.
+
+        GatewayAPI accepts a JSON list of messages and answers with one id per
+        message, in submission order.
+        """
+        if len(payloads) == 1:
+            response = self._request('POST', 'rest/mtsms', payload=payloads[0])
         else:
-            payload["encoding"] = "GSM7"
-            payload["class"] = "standard"
-            _logger.info("Message for %s uses GSM-7 encoding. Sending with class: %s.",
-                         [r['msisdn'] for r in payload['recipients']], payload["class"])
+            _logger.debug("Sending batch of %s messages to %s recipient(s).",
+                          len(payloads), sum(len(payload['recipients']) for payload in payloads))
+            response = self._request('POST', 'rest/mtsms', payload=payloads)
+        record_sent_messages(self.metrics, payloads)
+        return response
+
+
+_client_registry = {}
+_client_registry_lock = threading.Lock()
+_client_registry_stats = {'created': 0, 'reused': 0, 'evicted': 0, 'invalidated': 0}
+
+
+def get_client(api_token, base_url=None, pool_maxsize=None, idle_timeout=DEFAULT_CLIENT_IDLE_TIMEOUT,
+               circuit_failure_threshold=None, circuit_reset_timeout=None):
+    """Return the process-wide ``GatewayApiClient`` for ``(api_token, base_url)``.
+
+    Clients are kept alive between sends so their connections are reused instead of
+    paying a new TCP+TLS handshake per batch. Clients unused for ``idle_timeout``
+    seconds are closed, and the pool of a cached client grows to ``pool_maxsize``
+    when a caller needs more connections. The client's circuit breaker is shared by
+    every caller using the same account, and its metrics outlive the client.
+    """
+    base_url = base_url or DEFAULT_GATEWAYAPI_BASE_URL
+    key = (api_token, base_url)
+    pool_maxsize = pool_maxsize or DEFAULT_POOL_MAXSIZE
+    now = time.monotonic()
+    with _client_registry_lock:
+        for other_key, other_client in list(_client_registry.items()):
+            if other_key != key and now - other_client.last_used > idle_timeout:
+                del _client_registry[other_key]
+                other_client.close()
+                _client_registry_stats['evicted'] += 1
+        client = _client_registry.get(key)
+        if client is None:
+            client = _client_registry[key] = GatewayApiClient(api_token, base_url, pool_maxsize=pool_maxsize,
+                                                              metrics=get_metrics(key))
+            _client_registry_stats['created'] += 1
+        else:
+            if pool_maxsize > client.pool_maxsize:
+                client.resize_pool(pool_maxsize)
+            _client_registry_stats['reused'] += 1
+        if circuit_failure_threshold is not None and circuit_reset_timeout is not None:
+            client.circuit_breaker.configure(circuit_failure_threshold, circuit_reset_timeout)
+        client.last_used = now
+        return client
+
+
+def invalidate_client(api_token, base_url=None):
+    """Close and forget the cached client for ``(api_token, base_url)``, e.g. after a credentials change."""
+    with _client_registry_lock:
+        client = _client_registry.pop((api_token, base_url or DEFAULT_GATEWAYAPI_BASE_URL), None)
+        if client is not None:
+            client.close()
+            _client_registry_stats['invalidated'] += 1
+
 
-        return self._request('POST', 'rest/mtsms', payload=payload)
+def client_registry_stats():
+    """Return the registry counters together with the connection counters of every cached client."""
+    with _client_registry_lock:
+        clients = list(_client_registry.values())
+        stats = dict(_client_registry_stats, cached_clients=len(clients))
+    connection_stats = [client.connection_stats() for client in clients]
+    stats['connections_opened'] = sum(item['connections_opened'] for item in connection_stats)
+    stats['connections_reused'] = sum(item['connections_reused'] for item in connection_stats)
+    stats['requests'] = sum(item['requests'] for item in connection_stats)
+    return stats
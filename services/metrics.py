@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import bisect
+import re
+import threading
+import time
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0) # Seconds
+DEFAULT_PAYLOAD_LOG_SAMPLE_RATE = 0.01 # Share of requests whose bodies are logged at DEBUG level
+STATUS_TIMEOUT = 'timeout'
+STATUS_CONNECTION_ERROR = 'connection_error'
+
+_ENDPOINT_ID_RE = re.compile(r'/\d+(?=/|$)')
+
+_metrics_registry = {}
+_metrics_registry_lock = threading.Lock()
+
+
+def endpoint_label(endpoint):
+    """Normalize ``endpoint`` for use as a metric label, e.g. ``rest/mtsms/123`` becomes ``rest/mtsms/{id}``."""
+    return _ENDPOINT_ID_RE.sub('/{id}', endpoint.strip('/'))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; not thread-safe on its own, ``GatewayApiMetrics`` locks around it."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot counts observations above the largest bucket
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate the ``q`` quantile as the upper bound of the bucket holding it (``max`` past the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count, 'sum': self.total, 'max': self.max,
+            'avg': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5), 'p99': self.quantile(0.99),
+            'buckets': list(zip(self.buckets + (float('inf'),), self.counts)),
+        }
+
+
+class GatewayApiMetrics:
+    """Thread-safe counters for the requests and messages sent to one GatewayAPI account.
+
+    Tracks requests and latency per endpoint, responses per status code (or failure
+    kind for requests that got no response), request body bytes, messages,
+    recipients and segments per encoding, and the segments saved by GSM-7
+    transliteration. Recording only touches in-memory counters.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.requests = {} # endpoint -> count
+            self.latency = {} # endpoint -> LatencyHistogram
+            self.statuses = {} # (endpoint, status) -> count
+            self.bytes_sent = 0
+            self.messages = {} # encoding -> {'messages': n, 'recipients': n, 'segments': n}
+            self.transliterated = 0
+            self.segments_saved = 0
+
+    def record_request(self, method, endpoint, status, duration, bytes_sent=0):
+        """Record one request to ``endpoint``; ``status`` is the HTTP status code or a ``STATUS_*`` failure kind."""
+        label = f"{method} {endpoint_label(endpoint)}"
+        with self._lock:
+            self.requests[label] = self.requests.get(label, 0) + 1
+            histogram = self.latency.get(label)
+            if histogram is None:
+                histogram = self.latency[label] = LatencyHistogram(self._buckets)
+            histogram.observe(duration)
+            self.statuses[(label, str(status))] = self.statuses.get((label, str(status)), 0) + 1
+            self.bytes_sent += bytes_sent
+
+    def record_messages(self, encoding, messages, recipients, segments):
+        """Record ``messages`` accepted by GatewayAPI for ``recipients`` in total, billed as ``segments``."""
+        with self._lock:
+            counters = self.messages.setdefault(encoding, {'messages': 0, 'recipients': 0, 'segments': 0})
+            counters['messages'] += messages
+            counters['recipients'] += recipients
+            counters['segments'] += segments
+
+    def record_transliteration(self, messages, segments_saved):
+        """Record ``messages`` rewritten to GSM-7 before sending, needing ``segments_saved`` fewer segments."""
+        with self._lock:
+            self.transliterated += messages
+            self.segments_saved += segments_saved
+
+    def snapshot(self):
+        """Return a copy of all counters as plain data."""
+        with self._lock:
+            return {
+                'since': self.started,
+                'requests': dict(self.requests),
+                'latency': {label: histogram.snapshot() for label, histogram in self.latency.items()},
+                'statuses': dict(self.statuses),
+                'bytes_sent': self.bytes_sent,
+                'messages': {encoding: dict(counters) for encoding, counters in self.messages.items()},
+                'transliterated': self.transliterated,
+                'segments_saved': self.segments_saved,
+            }
+
+
+def get_metrics(key):
+    """Return the process-wide ``GatewayApiMetrics`` for ``key``, kept across client evictions."""
+    with _metrics_registry_lock:
+        metrics = _metrics_registry.get(key)
+        if metrics is None:
+            metrics = _metrics_registry[key] = GatewayApiMetrics()
+        return metrics
+
+
+def _prometheus_labels(labels):
+    return ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                    for name, value in labels.items())
+
+
+def prometheus_text(snapshots):
+    """Render ``(labels, snapshot)`` pairs in the Prometheus text exposition format."""
+    families = {
+        'gatewayapi_requests_total': ('counter', 'Requests sent to GatewayAPI.', []),
+        'gatewayapi_responses_total': ('counter', 'GatewayAPI responses by status code or failure kind.', []),
+        'gatewayapi_request_duration_seconds': ('histogram', 'GatewayAPI request latency.', []),
+        'gatewayapi_request_bytes_total': ('counter', 'Request body bytes sent to GatewayAPI.', []),
+        'gatewayapi_messages_total': ('counter', 'Messages accepted by GatewayAPI.', []),
+        'gatewayapi_recipients_total': ('counter', 'Recipients of the messages accepted by GatewayAPI.', []),
+        'gatewayapi_segments_total': ('counter', 'SMS segments accepted by GatewayAPI.', []),
+        'gatewayapi_transliterated_messages_total': ('counter', 'Messages rewritten to GSM-7 before sending.', []),
+        'gatewayapi_transliteration_segments_saved_total': ('counter', 'SMS segments saved by rewriting messages to GSM-7.', []),
+    }
+    for labels, snapshot in snapshots:
+        for label, count in snapshot['requests'].items():
+            families['gatewayapi_requests_total'][2].append(('', dict(labels, endpoint=label), count))
+        for (label, status), count in snapshot['statuses'].items():
+            families['gatewayapi_responses_total'][2].append(('', dict(labels, endpoint=label, status=status), count))
+        for label, histogram in snapshot['latency'].items():
+            samples = families['gatewayapi_request_duration_seconds'][2]
+            cumulative = 0
+            for bound, count in histogram['buckets']:
+                cumulative += count
+                samples.append(('_bucket', dict(labels, endpoint=label, le='+Inf' if bound == float('inf') else bound), cumulative))
+            samples.append(('_sum', dict(labels, endpoint=label), histogram['sum']))
+            samples.append(('_count', dict(labels, endpoint=label), histogram['count']))
+        families['gatewayapi_request_bytes_total'][2].append(('', dict(labels), snapshot['bytes_sent']))
+        families['gatewayapi_transliterated_messages_total'][2].append(('', dict(labels), snapshot['transliterated']))
+        families['gatewayapi_transliteration_segments_saved_total'][2].append(('', dict(labels), snapshot['segments_saved']))
+        for encoding, counters in snapshot['messages'].items():
+            for counter in ('messages', 'recipients', 'segments'):
+                families[f'gatewayapi_{counter}_total'][2].append(('', dict(labels, encoding=encoding), counters[counter]))
+    lines = []
+    for name, (metric_type, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{{{_prometheus_labels(labels)}}} {value}")
+    return '\n'.join(lines) + '\n'
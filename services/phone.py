@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import re
+from functools import lru_cache
+
+E164_MIN_DIGITS = 8 # Shortest country code + subscriber number accepted
+E164_MAX_DIGITS = 15
+NORMALIZE_CACHE_SIZE = 65536
+_SEPARATORS = str.maketrans('', '', " \t-./() ")
+# National trunk prefix sometimes written after the country code, as in "+44 (0)20 7946 0000".
+_TRUNK_PREFIX_RE = re.compile(r'\(\s*0\s*\)')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_msisdn(number, default_country_code=None):
+    """Return ``number`` as E.164 digits without the leading ``+`` (GatewayAPI's MSISDN format).
+
+    ``+45 12 34 56 78``, ``0045 12345678`` and, with ``default_country_code`` ``45``,
+    ``12345678`` all become ``4512345678``; a ``(0)`` trunk prefix after the country code,
+    as in ``+45 (0) 12345678``, is dropped. Numbers without international prefix get
+    ``default_country_code`` prepended after dropping a single national trunk ``0``;
+    without a default country code they are assumed to already contain one. Returns
+    ``None`` when the result cannot be an E.164 number. Results are memoised, as
+    campaigns keep sending to the same numbers.
+    """
+    if not number:
+        return None
+    text = str(number).strip()
+    if text.startswith(('+', '00')):
+        text = _TRUNK_PREFIX_RE.sub('', text, count=1)
+    digits = text.translate(_SEPARATORS)
+    if digits.startswith('+'):
+        digits = digits[1:]
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif default_country_code:
+        if digits.startswith('0'):
+            digits = digits[1:]
+        digits = default_country_code + digits
+    if not digits.isdigit() or not digits.isascii() or digits.startswith('0') \
+            or not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+    return digits
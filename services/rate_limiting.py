@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` tokens per second with bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("TokenBucket rate must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(self.rate, 1.0))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """Take ``tokens`` if available and return 0, otherwise return the seconds to wait before retrying.
+
+        Requests larger than the capacity wait for a full bucket and leave it in
+        debt, so the long-term average rate is still respected.
+        """
+        with self._lock:
+            self._refill()
+            needed = min(tokens, self.capacity)
+            if self._tokens >= needed:
+                self._tokens -= tokens
+                return 0
+            return (needed - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` can be taken from the bucket."""
+        wait = self.reserve(tokens)
+        while wait:
+            self._sleep(wait)
+            wait = self.reserve(tokens)
+
+    def on_success(self):
+        """Feedback hook called after an accepted request; a fixed-rate bucket ignores it."""
+
+    def on_throttle(self, retry_after=None):
+        """Feedback hook called when GatewayAPI throttles the sending; a fixed-rate bucket ignores it."""
+
+    async def acquire_async(self, tokens=1):
+        """Like ``acquire`` but yields to the event loop while waiting."""
+        wait = self.reserve(tokens)
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.reserve(tokens)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate follows GatewayAPI throttling (AIMD).
+
+    The rate is halved on every throttling response, down to ``min_rate``, and grows
+    back linearly by ``increase`` per successful request up to ``max_rate``.
+    """
+
+    def __init__(self, max_rate, min_rate=None, increase=None, **kwargs):
+        super().__init__(max_rate, **kwargs)
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min_rate or max(self.max_rate / 16.0, 0.1))
+        self.increase = float(increase or max(self.max_rate / 20.0, 0.1))
+
+    def on_success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2.0)
+            if retry_after:
+                # Go into debt so nothing is sent before the server's Retry-After delay.
+                self._tokens = min(self._tokens, 0.0) - retry_after * self.rate
+        _logger.info("GatewayAPI throttled the sending; rate lowered to %.2f messages/second.", self.rate)
+
+
+def get_rate_limiter(key, rate):
+    """Return the process-wide ``AdaptiveTokenBucket`` for ``key``, or ``None`` when ``rate`` is not positive.
+
+    The bucket is shared by every send running in this process for the same key and
+    is replaced when the configured rate changes.
+    """
+    with _rate_limiters_lock:
+        if not rate or rate <= 0:
+            _rate_limiters.pop(key, None)
+            return None
+        limiter = _rate_limiters.get(key)
+        if limiter is None or limiter.max_rate != float(rate):
+            limiter = _rate_limiters[key] = AdaptiveTokenBucket(rate)
+        return limiter
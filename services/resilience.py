@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import email.utils
+import logging
+import random
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5 # Seconds
+DEFAULT_BACKOFF_MAX = 30.0 # Seconds
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RESET_TIMEOUT = 60 # Seconds
+
+# 500 is left out on purpose: the message may have been accepted before the error.
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+# Methods safe to repeat after a timeout or a dropped connection, e.g. cancelling a scheduled message.
+IDEMPOTENT_METHODS = frozenset({'GET', 'DELETE'})
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds announced by a ``Retry-After`` header value, or ``None``."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at ``backoff_max`` and overridden by Retry-After."""
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, jitter=random.uniform):
+        self.max_retries = max(max_retries, 0)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._jitter = jitter
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number ``attempt`` (starting at 0)."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return self._jitter(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Per-account circuit breaker.
+
+    After ``failure_threshold`` consecutive transient failures the circuit opens and
+    requests fail immediately for ``reset_timeout`` seconds. Then a single probe
+    request is let through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_CIRCUIT_RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe = None # Token of the half-open probe in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def configure(self, failure_threshold, reset_timeout):
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.reset_timeout = reset_timeout
+
+    def allow_request(self):
+        """Return whether a request may be sent now.
+
+        Refused requests get ``False`` and requests of a closed circuit ``True``. The single
+        half-open probe gets a token instead, to pass to ``release_probe`` once it ended.
+        """
+        with self._lock:
+            if self._state == self.CLOSED or not self.failure_threshold:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe = None
+            if self._probe is not None:
+                return False
+            self._probe = object()
+            return self._probe
+
+    def release_probe(self, probe):
+        """End the half-open probe ``probe`` (returned by ``allow_request``) whatever its outcome.
+
+        Lets another probe through when the answer counted neither as success nor as failure
+        (e.g. throttling). Requests started earlier, and probes of an earlier half-open period,
+        do not hold the current token and release nothing.
+        """
+        with self._lock:
+            if self._probe is probe:
+                self._probe = None
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                _logger.info("GatewayAPI circuit breaker closed again after a successful request.")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.failure_threshold and (self._state == self.HALF_OPEN or self._failures >= self.failure_threshold):
+                if self._state != self.OPEN:
+                    _logger.warning("GatewayAPI circuit breaker opened after %s consecutive failure(s); "
+                                    "failing fast for %s seconds.", self._failures, self.reset_timeout)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
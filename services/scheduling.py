@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timezone
+
+DEFAULT_STAGGER_SLOT_SECONDS = 60
+
+
+def to_sendtime(value):
+    """Return the Unix time GatewayAPI expects as ``sendtime`` for a naive UTC ``datetime`` or a number."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def stagger_sendtimes(count, start, window=0, slot_seconds=DEFAULT_STAGGER_SLOT_SECONDS):
+    """Spread the send times of ``count`` messages over ``window`` seconds from ``start``.
+
+    Messages are cut into consecutive blocks of about equal size, evenly spaced and at least
+    ``slot_seconds`` apart, so that neighbouring messages (e.g. sorted by content) share a
+    send time and can still be submitted together. Returns one Unix send time per message.
+    """
+    start = to_sendtime(start)
+    slots = max(min(int(window // max(slot_seconds, 1)), count), 1)
+    step = window / slots if slots > 1 else 0
+    return [start + int((index * slots // count) * step) for index in range(count)]
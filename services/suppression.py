@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+DEFAULT_SUPPRESSION_CHECK_INTERVAL = 30 # Seconds between checks of the suppression table for changes
+DEFAULT_SUPPRESSION_RELOAD_INTERVAL = 3600 # Seconds between full reloads, which also drop edited numbers
+
+_suppression_indexes = {}
+_suppression_indexes_lock = threading.Lock()
+
+
+class SuppressionIndex:
+    """In-memory copy of a suppression list: one set of numbers per provider id, ``0`` for all providers.
+
+    Lookups are set membership tests. The owner keeps it in sync with its table by
+    loading the rows written since ``last_write_date`` (``add``), and reloads everything
+    (``replace``) when the number of rows loaded then differs from the table's.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.numbers = {}
+        self.row_ids = set()
+        self.last_write_date = None
+        self.checked_at = 0.0
+        self.loaded_at = None
+
+    def is_suppressed(self, provider_id, number):
+        provider_numbers = self.numbers.get(provider_id)
+        global_numbers = self.numbers.get(0)
+        return bool((global_numbers and number in global_numbers) or (provider_numbers and number in provider_numbers))
+
+    def add(self, rows):
+        """Add ``(id, provider_id, number, write_date)`` rows."""
+        for row_id, provider_id, number, write_date in rows:
+            self.numbers.setdefault(provider_id or 0, set()).add(number)
+            self.row_ids.add(row_id)
+            if self.last_write_date is None or write_date > self.last_write_date:
+                self.last_write_date = write_date
+
+    def replace(self, rows):
+        self.numbers = {}
+        self.row_ids = set()
+        self.last_write_date = None
+        self.add(rows)
+        self.loaded_at = time.monotonic()
+
+    def needs_check(self, interval=DEFAULT_SUPPRESSION_CHECK_INTERVAL):
+        return time.monotonic() - self.checked_at >= interval
+
+    def needs_reload(self, interval=DEFAULT_SUPPRESSION_RELOAD_INTERVAL):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= interval
+
+    def expire(self):
+        """Have the next lookup check the table again, e.g. after this process changed it."""
+        self.checked_at = 0.0
+
+
+def get_suppression_index(key):
+    """Return the process-wide ``SuppressionIndex`` for ``key`` (a database name)."""
+    with _suppression_indexes_lock:
+        index = _suppression_indexes.get(key)
+        if index is None:
+            index = _suppression_indexes[key] = SuppressionIndex()
+        return index
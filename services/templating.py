@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import re
+
+DEFAULT_TEMPLATE_MAX_TAGS = 5
+DEFAULT_TEMPLATE_MIN_RECIPIENTS = 2
+TEMPLATE_MAX_CLUSTERS_PER_SHAPE = 8 # Candidate templates tried per message before starting a new one
+TAG_FORMAT = "%%TAG%s%%"
+TAG_MARKER = "%TAG"
+
+_WHITESPACE_SPLIT_RE = re.compile(r'(\s+)')
+
+
+def render_template(template, tags, tag_values):
+    """Return ``template`` with every tag of ``tags`` replaced by the matching entry of ``tag_values``."""
+    for tag, value in zip(tags, tag_values):
+        template = template.replace(tag, value)
+    return template
+
+
+def _runs(positions):
+    """Group sorted word positions (even token indexes) into runs of adjacent words."""
+    runs = []
+    for position in sorted(positions):
+        if runs and position == runs[-1][1] + 2:
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+    return runs
+
+
+def _cluster_template(tokens, runs):
+    """Build ``(template, tags)`` from reference ``tokens``, one tag per run of varying words.
+
+    Returns ``None`` when a tag would also match the fixed text, so rendering could not
+    give the original contents back.
+    """
+    tags = [TAG_FORMAT % (index + 1) for index in range(len(runs))]
+    parts, start = [], 0
+    for tag, (first, last) in zip(tags, runs):
+        parts.append(''.join(tokens[start:first]))
+        parts.append(tag)
+        start = last + 1
+    parts.append(''.join(tokens[start:]))
+    if TAG_MARKER in ''.join(parts[0::2]):
+        return None
+    return ''.join(parts), tags
+
+
+def find_templates(contents, max_tags=DEFAULT_TEMPLATE_MAX_TAGS, min_size=DEFAULT_TEMPLATE_MIN_RECIPIENTS):
+    """Detect contents rendered from a common template, e.g. ``"Hi Anne, ..."`` and ``"Hi Bo, ..."``.
+
+    Contents are split into words and whitespace. Contents with the same number of words
+    and the same whitespace are compared word by word; they share a template when they
+    differ in at most ``max_tags`` runs of adjacent words and agree on at least one word.
+    Returns ``{content: (template, tags, tag_values)}`` for the contents of templates shared
+    by at least ``min_size`` distinct contents; other contents, and contents containing a tag
+    marker (``%TAG``), are left out.
+    """
+    shapes = {}
+    for content in dict.fromkeys(contents):
+        # A tag marker in a value could be replaced again, depending on GatewayAPI's substitution order.
+        if not content or TAG_MARKER in content:
+            continue
+        tokens = _WHITESPACE_SPLIT_RE.split(content)
+        shapes.setdefault((len(tokens), tuple(tokens[1::2])), []).append((content, tokens))
+
+    templates = {}
+    for group in shapes.values():
+        if len(group) < min_size:
+            continue
+        word_count = (len(group[0][1]) + 1) // 2
+        clusters = [] # [reference tokens, varying word positions, member contents and tokens]
+        for content, tokens in group:
+            for cluster in clusters[-TEMPLATE_MAX_CLUSTERS_PER_SHAPE:]:
+                reference, varying, members = cluster
+                differing = {index for index in range(0, len(tokens), 2) if tokens[index] != reference[index]}
+                merged = varying | differing
+                if len(merged) < word_count and len(_runs(merged)) <= max_tags:
+                    cluster[1] = merged
+                    members.append((content, tokens))
+                    break
+            else:
+                clusters.append([tokens, set(), [(content, tokens)]])
+
+        for reference, varying, members in clusters:
+            if len(members) < min_size or not varying:
+                continue
+            runs = _runs(varying)
+            built = _cluster_template(reference, runs)
+            if built is None:
+                continue
+            template, tags = built
+            for content, tokens in members:
+                tag_values = [''.join(tokens[first:last + 1]) for first, last in runs]
+                if render_template(template, tags, tag_values) == content: # Values may contain a tag themselves
+                    templates[content] = (template, tags, tag_values)
+    return templates
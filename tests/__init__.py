@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_services
+from . import test_provider
+from . import test_webhook
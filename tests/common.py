@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import hmac
+import json
+import uuid
+
+from odoo.addons.gatewayapi_sms_iap.benchmarks.fake_gatewayapi import FakeGatewayApiConfig, FakeGatewayApiServer
+
+
+def start_fake_server(case, **config):
+    """Serve a fake GatewayAPI for the duration of the test ``case`` and return the server."""
+    server = FakeGatewayApiServer(FakeGatewayApiConfig(retry_after=0, **config))
+    server.__enter__()
+    case.addCleanup(server.__exit__, None, None, None)
+    return server
+
+
+def make_gatewayapi_token(payload, secret, alg='HS256'):
+    """Build the JWT GatewayAPI sends in the ``X-Gwapi-Signature`` header of its webhooks."""
+    def encode(data):
+        return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+    signing_input = f"{encode(json.dumps({'alg': alg, 'typ': 'JWT'}).encode())}.{encode(json.dumps(payload).encode())}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{encode(signature)}"
+
+
+def gatewayapi_provider_values(base_url, **values):
+    """Values of a GatewayAPI provider sending to ``base_url``, with its own API token.
+
+    A token of its own gives the provider its own cached client, circuit breaker and metrics.
+    """
+    return dict({
+        'name': "GatewayAPI Test",
+        'provider': 'gatewayapi',
+        'gatewayapi_api_token': f"test-{uuid.uuid4().hex}",
+        'gatewayapi_base_url': base_url,
+        'gatewayapi_sender_name': "Test",
+        'gatewayapi_use_spool': False,
+        'gatewayapi_check_balance_enabled': False,
+        'gatewayapi_max_retries': 0,
+    }, **values)
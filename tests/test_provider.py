@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+from .common import gatewayapi_provider_values, start_fake_server
+
+
+class TestGatewayApiProvider(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = start_fake_server(self)
+        self.provider = self.env['iap.alternative.provider'].create(gatewayapi_provider_values(
+            self.server.url,
+            gatewayapi_max_recipients_per_request=2,
+            gatewayapi_batch_mode=True,
+            gatewayapi_batch_max_messages=2,
+        ))
+
+    def _messages(self, contents):
+        return [{'res_id': index + 1, 'number': f"452000{index:04d}", 'content': content}
+                for index, content in enumerate(contents)]
+
+    def test_group_messages(self):
+        messages = self._messages(["Hello"] * 5 + ["Bye"] * 2 + ["Hej \U0001F44B"])
+        chunks = self.provider._gatewayapi_group_messages(messages)
+        self.assertEqual([(content, encoding, len(chunk)) for content, encoding, chunk, tags in chunks], [
+            ("Hello", "GSM7", 2), ("Hello", "GSM7", 2), ("Hello", "GSM7", 1),
+            ("Bye", "GSM7", 2),
+            ("Hej \U0001F44B", "UCS2", 1),
+        ])
+        self.assertEqual([message_data['res_id'] for content, encoding, chunk, tags in chunks for message_data in chunk],
+                         [1, 2, 3, 4, 5, 6, 7, 8], "Recipients keep their order within each group")
+
+    def test_send_grouped_batches(self):
+        messages = self._messages(["Hello"] * 5 + ["Bye"] * 2 + ["Hej \U0001F44B"])
+        results = self.provider._gatewayapi_send_messages(messages)
+        self.assertEqual([result['res_id'] for result in results], [1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertTrue(all(result['state'] == 'success' for result in results))
+        # 5 messages of at most 2 recipients, submitted in batches of at most 2 messages.
+        self.assertEqual(self.server.stats['messages'], 5)
+        self.assertEqual(self.server.stats['requests'], 3)
+        self.assertEqual(self.server.stats['recipients'], 8)
+        message_ids = [result['message_id_3rd_party'] for result in results]
+        self.assertEqual(message_ids[0], message_ids[1], "Recipients of one message share its id")
+        self.assertNotEqual(message_ids[1], message_ids[2])
+
+    def test_rejected_message_isolated(self):
+        self.server.config.reject_recipients = {"4520000002"}
+        messages = self._messages(["Hello"] * 5 + ["Bye"] * 2)
+        states = {result['res_id']: result['state'] for result in self.provider._gatewayapi_send_messages(messages)}
+        # The batch holding the bad number is split: only the message sent to it fails, for both its recipients.
+        self.assertEqual(states, {1: 'success', 2: 'success', 3: 'wrong_number_format', 4: 'wrong_number_format',
+                                  5: 'success', 6: 'success', 7: 'success'})
+
+    def test_invalid_and_duplicate_numbers(self):
+        messages = [
+            {'res_id': 1, 'number': "+45 20 00 00 01", 'content': "Hello"},
+            {'res_id': 2, 'number': "004520000001", 'content': "Hello"},
+            {'res_id': 3, 'number': "not a number", 'content': "Hello"},
+        ]
+        results = {result['res_id']: result for result in self.provider._gatewayapi_send_messages(messages)}
+        self.assertEqual(results[1]['state'], 'success')
+        self.assertEqual(results[2]['message_id_3rd_party'], results[1]['message_id_3rd_party'])
+        self.assertEqual(results[3]['state'], 'wrong_number_format')
+        self.assertEqual(self.server.stats['recipients'], 1)
+
+    def test_suppressed_number_blacklisted(self):
+        self.env['gatewayapi.sms.suppression'].create({'number': "4520000001"})
+        sms_sent, sms_suppressed = self.env['sms.sms'].create([
+            {'number': "4520000000", 'body': "Hello"},
+            {'number': "4520000001", 'body': "Hello"},
+        ])
+        results = self.provider._sms_send(self.env['iap.account'].browse(), [
+            {'res_id': sms.id, 'number': sms.number, 'content': sms.body} for sms in sms_sent | sms_suppressed])
+        self.assertEqual([result['res_id'] for result in results], sms_sent.ids,
+                         "Suppressed SMS are left out of the results Odoo post-processes")
+        (sms_sent | sms_suppressed)._postprocess_iap_sent_sms(results)
+        self.assertEqual(sms_suppressed.state, 'error')
+        self.assertEqual(sms_suppressed.failure_type, 'sms_blacklist')
+        self.assertEqual(self.server.stats['recipients'], 1)
+
+    def test_spool_drain_failure_recorded(self):
+        self.provider.gatewayapi_use_spool = True
+        self.server.config.reject_recipients = {"4520000001"}
+        sms_sent, sms_rejected = self.env['sms.sms'].create([
+            {'number': "4520000000", 'body': "Hello"},
+            {'number': "4520000001", 'body': "Bye"},
+        ])
+        results = self.provider._sms_send(self.env['iap.account'].browse(), [
+            {'res_id': sms.id, 'number': sms.number, 'content': sms.body} for sms in sms_sent | sms_rejected])
+        self.assertEqual(results, [], "Queued SMS are not finalised before they are sent")
+        scheduled_state = self.env['sms.sms']._gatewayapi_scheduled_state()
+        self.assertEqual((sms_sent | sms_rejected).mapped('state'), [scheduled_state] * 2)
+        self.assertEqual(self.server.stats['requests'], 0)
+
+        self.env['gatewayapi.sms.spool']._cron_drain()
+        self.assertEqual(sms_sent.state, scheduled_state)
+        self.assertTrue(sms_sent.gatewayapi_message_id)
+        self.assertEqual(sms_rejected.state, 'error')
+        self.assertEqual(sms_rejected.failure_type, 'sms_number_format')
+
+    def test_balance_ledger(self):
+        self.provider.gatewayapi_cost_per_segment = 0.5
+        self.provider._gatewayapi_store_balance(100.0, 'DKK')
+        self.provider._gatewayapi_send_messages(self._messages(["Hello"] * 4))
+        self.assertEqual(self.provider._gatewayapi_cached_balance(), (98.0, 'DKK'))
+        self.provider._gatewayapi_store_balance(50.0, 'DKK')
+        self.assertEqual(self.provider.gatewayapi_balance, 50.0, "A reconciliation supersedes earlier debits")
+
+    def test_balance_read_then_send(self):
+        """Reconcile and debit in one transaction, as a balance check followed by a send does."""
+        self.provider.write({'gatewayapi_cost_per_segment': 1.0, 'gatewayapi_credit_gate': True})
+        self.assertEqual(self.provider._gatewayapi_get_balance(), (self.server.config.credits, 'DKK'))
+        self.assertEqual(self.provider.gatewayapi_balance, self.server.config.credits)
+        self.assertFalse(self.provider._gatewayapi_check_credit_gate(self._messages(["Hello"] * 2)))
+        self.provider._gatewayapi_send_messages(self._messages(["Hello"] * 2))
+        self.assertEqual(self.provider.gatewayapi_balance, self.server.config.credits - 2)
+
+
+class TestGatewayApiPool(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = start_fake_server(self)
+        self.member = self.env['iap.alternative.provider'].create(gatewayapi_provider_values(self.server.url))
+        self.provider = self.env['iap.alternative.provider'].create(gatewayapi_provider_values(
+            self.server.url, gatewayapi_pool_provider_ids=[(6, 0, self.member.ids)]))
+        self.messages = [{'res_id': index + 1, 'number': f"452000{index:04d}", 'content': "Hello"} for index in range(4)]
+
+    def test_no_positive_weight(self):
+        (self.provider | self.member).write({'gatewayapi_pool_weight': 0.0})
+        results = self.provider._gatewayapi_submit_pooled(self.messages)
+        self.assertEqual({result['state'] for result in results}, {'server_error'})
+        self.assertEqual(self.server.stats['requests'], 0)
+
+    def test_balance_capped_members(self):
+        (self.provider | self.member).write({'gatewayapi_credit_gate': True, 'gatewayapi_cost_per_segment': 1.0})
+        self.provider._gatewayapi_store_balance(1.0, 'DKK')
+        self.member._gatewayapi_store_balance(2.0, 'DKK')
+        states = sorted(result['state'] for result in self.provider._gatewayapi_submit_pooled(self.messages))
+        self.assertEqual(states, ['insufficient_credit', 'success', 'success', 'success'])
+        self.assertEqual(self.server.stats['recipients'], 3)
+
+class TestGatewayApiDeliveryReports(TransactionCase):
+
+    def test_national_numbers_matched(self):
+        provider = self.env['iap.alternative.provider'].create(gatewayapi_provider_values(
+            "http://127.0.0.1:9", gatewayapi_default_country_code='45'))
+        sms_delivered, sms_failed = self.env['sms.sms'].create([
+            {'number': "20 00 00 01", 'body': "Hello"},
+            {'number': "20000002", 'body': "Hello"},
+        ])
+        self.env['sms.sms']._gatewayapi_link_message_ids({sms_delivered.id: '77', sms_failed.id: '77'})
+        Status = self.env['gatewayapi.sms.status']
+        Status._buffer_reports(provider, [
+            {'id': 77, 'msisdn': 4520000001, 'status': 'DELIVERED'},
+            {'id': 77, 'msisdn': 4520000002, 'status': 'UNDELIVERABLE'},
+        ])
+        Status.search([('provider_id', '=', provider.id)])._apply()
+        self.assertEqual(sms_delivered.state, 'sent')
+        self.assertEqual(sms_failed.state, 'error')
+        self.assertEqual(sms_failed.failure_type, 'sms_not_delivered')
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import time
+
+from odoo.tests.common import BaseCase
+
+from odoo.addons.gatewayapi_sms_iap.services.dispatch import submit_units, weighted_shares
+from odoo.addons.gatewayapi_sms_iap.services.exceptions import (
+    GatewayApiCircuitOpenError, GatewayApiError, GatewayApiTransientError,
+)
+from odoo.addons.gatewayapi_sms_iap.services.gatewayapi_client import GatewayApiClient, batch_bounds, build_sms_payload
+from odoo.addons.gatewayapi_sms_iap.services.phone import normalize_msisdn
+from odoo.addons.gatewayapi_sms_iap.services.resilience import CircuitBreaker, RetryPolicy
+from odoo.addons.gatewayapi_sms_iap.services.templating import find_templates, render_template
+
+from .common import start_fake_server
+
+
+def no_jitter(low, high):
+    return 0
+
+
+class TestNormalizeMsisdn(BaseCase):
+
+    def test_international_formats(self):
+        for number in ("+45 12 34 56 78", "0045 12345678", "+45-1234-5678", "4512345678",
+                       "+45 (0) 12345678", "0045(0)12345678"):
+            self.assertEqual(normalize_msisdn(number), "4512345678", number)
+
+    def test_default_country_code(self):
+        self.assertEqual(normalize_msisdn("12345678", "45"), "4512345678")
+        self.assertEqual(normalize_msisdn("07700 900123", "44"), "447700900123")
+        self.assertEqual(normalize_msisdn("+4512345678", "44"), "4512345678")
+
+    def test_invalid_numbers(self):
+        for number in (None, "", "12ab5678", "+45 1", "0012", "+" + "1" * 16):
+            self.assertIsNone(normalize_msisdn(number), number)
+
+
+class TestWeightedShares(BaseCase):
+
+    def test_proportional(self):
+        self.assertEqual(weighted_shares(10, [1, 1]), [5, 5])
+        self.assertEqual(weighted_shares(10, [3, 1]), [8, 2])
+        self.assertEqual(sum(weighted_shares(7, [1, 1, 1])), 7)
+
+    def test_zero_weight_gets_nothing(self):
+        self.assertEqual(weighted_shares(9, [1, 0, 2]), [3, 0, 6])
+
+    def test_capacities(self):
+        self.assertEqual(weighted_shares(10, [1, 1], [2, None]), [2, 8])
+        # What no member can take is left out.
+        self.assertEqual(weighted_shares(10, [1, 1], [2, 3]), [2, 3])
+
+
+class TestFindTemplates(BaseCase):
+
+    def test_round_trip(self):
+        contents = [f"Hi {name}, your order {order} is ready." for name, order in
+                    (("Anne", "#12"), ("Bo", "#7"), ("Carl Emil", "#1234"))]
+        contents.append("Unrelated text")
+        templates = find_templates(contents)
+        self.assertNotIn("Unrelated text", templates)
+        for content in contents[:2]:
+            template, tags, tag_values = templates[content]
+            self.assertEqual(render_template(template, tags, tag_values), content)
+        self.assertEqual(templates[contents[0]][0], templates[contents[1]][0])
+
+    def test_min_size(self):
+        self.assertEqual(find_templates(["Hi Anne, welcome.", "Hi Bo, welcome."], min_size=3), {})
+
+    def test_contents_with_tag_markers_skipped(self):
+        self.assertEqual(find_templates(["Hi %TAG1% x", "Hi y x"]), {})
+        templates = find_templates(["Hi Anne x", "Hi Bo x", "Hi %TAG2% x"])
+        self.assertEqual(set(templates), {"Hi Anne x", "Hi Bo x"})
+
+
+class TestBatchBounds(BaseCase):
+
+    def test_max_messages(self):
+        payloads = [build_sms_payload("Test", [f"45200000{index:02d}"], "Hello") for index in range(5)]
+        self.assertEqual(batch_bounds(payloads, max_messages=2), [(0, 2), (2, 4), (4, 5)])
+
+    def test_max_bytes(self):
+        payloads = [build_sms_payload("Test", ["4520000000"], "x" * 100) for index in range(3)]
+        self.assertEqual(batch_bounds(payloads, max_bytes=300), [(0, 1), (1, 2), (2, 3)])
+
+
+class TestCircuitBreaker(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: self.now)
+
+    def test_transitions(self):
+        breaker = self.breaker
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        self.now = 10
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request(), "A single probe is let through")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN, "A failed probe reopens the circuit")
+
+        self.now = 20
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_released_probe(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        probe = self.breaker.allow_request()
+        self.assertTrue(probe)
+        self.breaker.release_probe(probe)
+        self.assertTrue(self.breaker.allow_request(), "A probe ending without verdict lets another one through")
+
+    def test_single_probe(self):
+        earlier = self.breaker.allow_request() # Started while the circuit was closed
+        self.assertIs(earlier, True)
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        probe = self.breaker.allow_request()
+        self.assertTrue(probe)
+        self.assertIsNot(probe, True)
+        self.breaker.release_probe(earlier)
+        self.assertFalse(self.breaker.allow_request(), "Only the probe itself lets another probe through")
+        self.breaker.release_probe(probe)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(failure_threshold=0)
+        for attempt in range(10):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+
+
+class TestRetryPolicy(BaseCase):
+
+    def test_delay(self):
+        policy = RetryPolicy(max_retries=3, backoff_base=1, backoff_max=5, jitter=lambda low, high: high)
+        self.assertEqual([policy.delay(attempt) for attempt in range(4)], [1, 2, 4, 5])
+        self.assertEqual(policy.delay(0, retry_after=3), 3, "Retry-After overrides the backoff")
+        self.assertEqual(policy.delay(0, retry_after=60), 5)
+
+
+class TestClientDispatch(BaseCase):
+    """Client, retries, circuit breaker and batch splitting against the fake GatewayAPI server."""
+
+    def setUp(self):
+        super().setUp()
+        self.server = start_fake_server(self, seed=1)
+        self.client = GatewayApiClient("test-token", base_url=self.server.url)
+        self.addCleanup(self.client.close)
+
+    def _units(self, numbers):
+        return [(self.client.build_sms_payload("Test", [number], "Hello"), [{'res_id': index, 'number': number}])
+                for index, number in enumerate(numbers)]
+
+    def test_send(self):
+        outcomes = submit_units(self.client, self._units(["4520000001", "4520000002"]))
+        self.assertEqual(len(outcomes), 1)
+        units, response, error = outcomes[0]
+        self.assertIsNone(error)
+        self.assertEqual(len(response['ids']), 2)
+        self.assertEqual(self.server.stats['requests'], 1)
+        self.assertEqual(self.server.stats['recipients'], 2)
+
+    def test_retry_transient_error(self):
+        # With this seed the fake server fails the first request with 503 and accepts the second.
+        self.server.config.error_rate = 0.5
+        outcomes = submit_units(self.client, self._units(["4520000001"]), retry_policy=RetryPolicy(2, jitter=no_jitter))
+        self.assertIsNone(outcomes[0][2])
+        self.assertEqual(self.server.stats['requests'], 2)
+        self.assertEqual(self.server.stats['failed'], 1)
+
+    def test_retries_exhausted(self):
+        self.server.config.error_rate = 1.0
+        outcomes = submit_units(self.client, self._units(["4520000001"]), retry_policy=RetryPolicy(2, jitter=no_jitter))
+        error = outcomes[0][2]
+        self.assertIsInstance(error, GatewayApiTransientError)
+        self.assertEqual(error.status_code, 503)
+        self.assertEqual(self.server.stats['requests'], 3)
+
+    def test_rejected_batch_is_split(self):
+        self.server.config.reject_recipients = {"4520000003"}
+        units = self._units(["4520000001", "4520000002", "4520000003", "4520000004"])
+        outcomes = submit_units(self.client, units)
+        self.assertEqual([len(outcome_units) for outcome_units, response, error in outcomes], [2, 1, 1])
+        errors = [error for outcome_units, response, error in outcomes]
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], GatewayApiError)
+        self.assertEqual(errors[1].status_code, 422)
+        self.assertIsNone(errors[2])
+        self.assertEqual(outcomes[1][0], units[2:3])
+
+    def test_rejected_message_not_resent(self):
+        self.server.config.reject_recipients = {"4520000001"}
+        outcomes = submit_units(self.client, self._units(["4520000001"]), retry_policy=RetryPolicy(2, jitter=no_jitter))
+        self.assertFalse(outcomes[0][2].transient)
+        self.assertEqual(self.server.stats['requests'], 1)
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        breaker = self.client.circuit_breaker
+        breaker.configure(failure_threshold=2, reset_timeout=0.05)
+        self.server.config.error_rate = 1.0
+        for attempt in range(2):
+            with self.assertRaises(GatewayApiTransientError):
+                self.client.get_balance()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        requests_count = self.server.stats['requests']
+        with self.assertRaises(GatewayApiCircuitOpenError):
+            self.client.send_sms("Test", ["4520000001"], "Hello")
+        self.assertEqual(self.server.stats['requests'], requests_count, "An open circuit sends nothing")
+
+        time.sleep(0.06)
+        self.server.config.error_rate = 0.0
+        self.assertEqual(self.client.get_balance()['credits'], self.server.config.credits)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_server_error_counts_as_failure(self):
+        self.client.circuit_breaker.configure(failure_threshold=1, reset_timeout=60)
+        self.server.config.error_rate = 1.0
+        with self.assertRaises(GatewayApiTransientError):
+            self.client.get_balance()
+        self.assertEqual(self.client.circuit_breaker.state, CircuitBreaker.OPEN)
+
+    def test_throttled_probe_releases_circuit(self):
+        breaker = self.client.circuit_breaker
+        breaker.configure(failure_threshold=1, reset_timeout=0.05)
+        self.server.config.error_rate = 1.0
+        with self.assertRaises(GatewayApiTransientError):
+            self.client.get_balance()
+        time.sleep(0.06)
+        self.server.config.error_rate = 0.0
+        self.server.config.throttle_rate = 1.0
+        with self.assertRaises(GatewayApiTransientError) as error:
+            self.client.get_balance()
+        self.assertEqual(error.exception.status_code, 429)
+
+        # The throttled probe neither closed nor reopened the circuit, but must not block it.
+        self.server.config.throttle_rate = 0.0
+        self.assertEqual(self.client.get_balance()['credits'], self.server.config.credits)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests.common import BaseCase, HttpCase, tagged
+
+from odoo.addons.gatewayapi_sms_iap.controllers.main import verify_gatewayapi_signature
+
+from .common import gatewayapi_provider_values, make_gatewayapi_token
+
+REPORT = {'id': 1000, 'msisdn': 4520000001, 'status': 'DELIVERED', 'time': 1700000000}
+
+
+class TestWebhookSignature(BaseCase):
+
+    def test_valid_signature_returns_payload(self):
+        token = make_gatewayapi_token(REPORT, "secret")
+        self.assertEqual(verify_gatewayapi_signature(token, "secret"), REPORT)
+
+    def test_invalid_signatures(self):
+        token = make_gatewayapi_token(REPORT, "secret")
+        header_b64, payload_b64, signature_b64 = token.split('.')
+        forged_payload_b64 = make_gatewayapi_token(dict(REPORT, status='REJECTED'), "other").split('.')[1]
+        for token, secret in (
+            (token, "wrong secret"),
+            (token, ""),
+            (token, None),
+            (None, "secret"),
+            ("not a token", "secret"),
+            (f"{header_b64}.{forged_payload_b64}.{signature_b64}", "secret"),
+            (make_gatewayapi_token(REPORT, "secret", alg='none'), "secret"),
+        ):
+            self.assertIsNone(verify_gatewayapi_signature(token, secret), token)
+
+
+@tagged('post_install', '-at_install')
+class TestWebhookController(HttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.provider = self.env['iap.alternative.provider'].create(gatewayapi_provider_values(
+            "http://127.0.0.1:9", gatewayapi_webhook_secret="secret"))
+        self.Status = self.env['gatewayapi.sms.status']
+
+    def _post(self, provider, token=None, body=REPORT):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['X-Gwapi-Signature'] = token
+        return self.url_open(f"/gatewayapi/status/{provider.id}", data=json.dumps(body), headers=headers)
+
+    def test_signed_report_is_buffered(self):
+        response = self._post(self.provider, make_gatewayapi_token(REPORT, "secret"))
+        self.assertEqual(response.status_code, 200)
+        status = self.Status.search([('provider_id', '=', self.provider.id)])
+        self.assertRecordValues(status, [{'message_id': '1000', 'msisdn': '4520000001', 'status': 'DELIVERED'}])
+
+    def test_report_read_from_signed_payload(self):
+        token = make_gatewayapi_token(REPORT, "secret")
+        response = self._post(self.provider, token, body=dict(REPORT, id=2000, status='REJECTED'))
+        self.assertEqual(response.status_code, 200)
+        status = self.Status.search([('provider_id', '=', self.provider.id)])
+        self.assertRecordValues(status, [{'message_id': '1000', 'status': 'DELIVERED'}])
+
+    def test_invalid_signature_rejected(self):
+        for token in (None, make_gatewayapi_token(REPORT, "other secret")):
+            self.assertEqual(self._post(self.provider, token).status_code, 403)
+        self.assertFalse(self.Status.search([('provider_id', '=', self.provider.id)]))
+
+    def test_rejected_without_secret(self):
+        self.provider.gatewayapi_webhook_secret = False
+        response = self._post(self.provider, make_gatewayapi_token(REPORT, ""))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.Status.search([('provider_id', '=', self.provider.id)]))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class GatewayApiSmsSchedule(models.TransientModel):
+    _name = 'gatewayapi.sms.schedule'
+    _description = 'Schedule SMS via GatewayAPI'
+
+    @api.model
+    def _default_provider_id(self):
+        return self.env['iap.alternative.provider'].search([('provider', '=', 'gatewayapi')], limit=1)
+
+    @api.model
+    def _default_sms_ids(self):
+        if self.env.context.get('active_model') != 'sms.sms':
+            return False
+        return [(6, 0, self.env.context.get('active_ids') or [])]
+
+    provider_id = fields.Many2one('iap.alternative.provider', string=_("Provider"), required=True,
+                                  domain=[('provider', '=', 'gatewayapi')], default=_default_provider_id)
+    sms_ids = fields.Many2many('sms.sms', string=_("SMS"), default=_default_sms_ids,
+                               help=_("Only the outgoing SMS among them are scheduled."))
+    send_at = fields.Datetime(string=_("Send At"), required=True,
+                              help=_("When GatewayAPI sends the first SMS. The SMS are handed over to GatewayAPI now."))
+    spread_seconds = fields.Integer(string=_("Spread Over (seconds)"), default=0,
+                                    help=_("Stagger the send times over this many seconds after Send At, "
+                                           "in blocks at least a minute apart. 0 sends them all at Send At."))
+
+    @api.constrains('spread_seconds')
+    def _check_spread_seconds(self):
+        for wizard in self:
+            if wizard.spread_seconds < 0:
+                raise ValidationError(_("The spread must be zero or a positive number of seconds."))
+
+    def action_schedule(self):
+        """Hand the selected outgoing SMS over to GatewayAPI for sending at the chosen time."""
+        self.ensure_one()
+        results = self.provider_id._gatewayapi_schedule_sms(self.sms_ids, self.send_at, self.spread_seconds)
+        failed = sum(1 for result in results if result['state'] != 'success')
+        message = _("%(scheduled)s SMS scheduled from %(send_at)s.") % {
+            'scheduled': len(results) - failed,
+            'send_at': fields.Datetime.context_timestamp(self, self.send_at).strftime('%Y-%m-%d %H:%M'),
+        }
+        if failed:
+            message += "\n" + _("%(count)s SMS could not be scheduled; see their failure reason.") % {'count': failed}
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {'title': _("GatewayAPI Scheduled SMS"), 'message': message, 'sticky': bool(failed),
+                       'type': 'warning' if failed else 'success',
+                       'next': {'type': 'ir.actions.act_window_close'}},
+        }